@@ -1,6 +1,27 @@
 from __future__ import print_function
+from array import array
+from collections import OrderedDict
+from collections.abc import KeysView, ValuesView, ItemsView
+from multiprocessing.reduction import ForkingPickler
+import errno
+import gc
+import hashlib
+import io
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
 import unittest
 
+try:
+    import fcntl
+except ImportError:                                     # Windows: writers are not locked out
+    fcntl = None
+
 '''
 Description:        Assignment 2:  Dictionaries
 Author:             Nicole Weickert
@@ -9,39 +30,183 @@ Helped:             "samson01"
 Help received from: Luke Smith
 '''
 
+_CHECKPOINT = struct.Struct("<8sIQ")                    # magic, version, entry count
+_CHECKPOINT_MAGIC = b"CS2050DC"
+_CHECKPOINT_BLOCK = 1 << 20                             # Bytes buffered per read or write while streaming
+_EMPTY = object()                                       # Marks a never-used slot in open-addressing storage
+_DELETED = object()                                     # Tombstone left behind by __delitem__ in open-addressing storage
+_MIGRATE_STEP = 8                                       # Old buckets moved per operation during an incremental resize
+_RESIZE_GAP = .1                                        # Least margin between shrink_at and half of grow_at
+
 class dictionary:
 
-    def __init__(self, init=None):
-        self.__limit = 10
-        self.__items = [[] for _ in range(self.__limit)]
+    def __init__(self, init=None, storage="chained", incremental=False,
+                 grow_at=.75, shrink_at=.25, min_limit=1):
+        """
+        storage selects the table layout:
+            "chained":  each bucket is a list of [hash, key, value] entries (the default).
+            "open":     linear probing over flat parallel arrays of hashes, keys and values,
+                        with tombstones marking deleted slots.
+        incremental spreads each resize over later operations instead of rebuilding the
+        whole table at once.  It requires chained storage.
+        grow_at and shrink_at are the load factors that double and halve the limit.
+        shrink_at must stay at least _RESIZE_GAP below half of grow_at, so that a table
+        just grown or halved is that far from the other threshold and a single insert or
+        delete cannot trigger the opposite resize.  The limit never drops below min_limit.  """
+
+        if storage not in ("chained", "open"):
+            raise ValueError("Storage must be 'chained' or 'open'.")
+        if incremental and storage != "chained":
+            raise ValueError("Incremental resizing requires chained storage.")
+        if not 0 <= shrink_at <= grow_at / 2 - _RESIZE_GAP:
+            raise ValueError("shrink_at must be at least 0 and at most half of grow_at minus %s." % _RESIZE_GAP)
+        if storage == "open" and grow_at >= 1:
+            raise ValueError("Open-addressing storage requires grow_at below 1.")
+        if min_limit < 1:
+            raise ValueError("min_limit must be at least 1.")
+        self.__storage = storage
+        self.__incremental = incremental
+        self.__grow_at = grow_at
+        self.__shrink_at = shrink_at
+        self.__min_limit = min_limit
+        self.__reserved = 0                             # Entry count promised by reserve()
+        self.__limit = max(10, min_limit)
         self.__length = 0
+        self.__old_items = None                         # Buckets still waiting to be migrated
+        self.__old_limit = 0
+        self.__migrated = 0                             # Index of the next old bucket to migrate
+        self.__version = 0                              # Bumped on every structural change
+        self.__iterating = 0                            # Live iterators; migration waits while any exist
+        self.__allocate()
 
         if init:
-            for i in init:
-                self.__setitem__(i[0], i[1])
+            self.update(init)
+
+    def __allocate(self):
+        ''' Creates empty storage sized to the current limit. '''
+        self.__version += 1
+        if self.__storage == "chained":
+            self.__items = [None] * self.__limit        # Buckets are created on first insert
+        else:
+            self.__hashes = array('q', [0]) * self.__limit
+            self.__keys = [_EMPTY] * self.__limit
+            self.__values = [None] * self.__limit
+            self.__used = 0                             # Live entries plus tombstones
 
     def __len__(self):
         return self.__length
 
-    def __flattened(self):
-        return [item for inner in self.__items for item in inner]
+    def __pairs(self):
+        ''' Yields each key/value pair in storage order. '''
+        if self.__storage == "chained":
+            for inner in self.__items:
+                if inner:
+                    for _, key, value in inner:
+                        yield key, value
+            if self.__old_items is not None:
+                for inner in self.__old_items[self.__migrated:]:
+                    if inner:
+                        for _, key, value in inner:
+                            yield key, value
+        else:
+            for key, value in zip(self.__keys, self.__values):
+                if key is not _EMPTY and key is not _DELETED:
+                    yield key, value
+
+    def _entries(self):
+        """
+        Yields each key/value pair straight from storage, without copying the table.
+        Raises RuntimeError if the dictionary is structurally modified mid-iteration.
+        Used by __iter__ and the keys(), values() and items() views. """
+
+        version = self.__version
+        self.__iterating += 1
+        try:
+            for pair in self.__pairs():
+                yield pair
+                if self.__version != version:
+                    raise RuntimeError("dictionary changed during iteration")
+        finally:
+            self.__iterating -= 1
 
     def __iter__(self):
-        return(iter(self.__flattened()))
+        return([key, value] for key, value in self._entries())
 
     def __str__(self):
-        return(str(self.__flattened()))
+        return("[" + ", ".join(str([key, value]) for key, value in self._entries()) + "]")
+
+    def __finditem(self, key, key_hash):
+        """
+        Finds the bucket for a key based on its hash value and the current limit.
+        Returns the bucket array and pair if it exists, otherwise None for both.
+        Stored hashes are compared before calling __eq__ on the keys.
+        During an incremental resize, unmigrated old buckets are searched as well. """
 
-    def __finditem(self,key):
+        bucket = self.__items[key_hash % self.__limit]
+        if bucket:
+            for pair in bucket:
+                if pair[0] == key_hash and (pair[1] is key or pair[1] == key):
+                    return bucket, pair
+        if self.__old_items is not None:
+            index = key_hash % self.__old_limit
+            if index >= self.__migrated and self.__old_items[index]:
+                for pair in self.__old_items[index]:
+                    if pair[0] == key_hash and (pair[1] is key or pair[1] == key):
+                        return self.__old_items[index], pair
+        return None, None
+
+    def __step(self):
+        """
+        Migrates the next few old buckets while an incremental resize is in progress.
+        Skipped while any iterator is live, since moving entries would invalidate it. """
+
+        if self.__old_items is not None and not self.__iterating:
+            self.__migrate(_MIGRATE_STEP)
+
+    def __bucket(self, key_hash):
+        ''' Returns the current table's bucket for a hash, creating it if needed. '''
+        index = key_hash % self.__limit
+        bucket = self.__items[index]
+        if bucket is None:
+            bucket = self.__items[index] = []
+        return bucket
+
+    def __migrate(self, steps):
+        """
+        Moves up to steps buckets from the old table into the current one.
+        Drops the old table once every bucket has been moved. """
+
+        self.__version += 1
+        old_items = self.__old_items
+        stop = min(self.__migrated + steps, self.__old_limit)
+        for index in range(self.__migrated, stop):
+            if old_items[index]:
+                for pair in old_items[index]:
+                    self.__bucket(pair[0]).append(pair)
+            old_items[index] = None
+        self.__migrated = stop
+        if stop == self.__old_limit:
+            self.__old_items = None
+
+    def __findslot(self, key, key_hash):
         """
-        Assigns a pair to the correct array based on the key hash value and current limit.
-        Returns the index array and pair if it exists ."""
+        Probes the open-addressing arrays linearly, starting at the key's home slot.
+        Returns the slot holding the key and True, or the first reusable slot and False.
+        Stored hashes are compared before calling __eq__ on the keys. """
 
-        index = hash(key) % self.__limit
-        for pair in self.__items[index]:
-            if pair[0] == key:
-                return index, pair
-        return index, None
+        keys, hashes, limit = self.__keys, self.__hashes, self.__limit
+        index = key_hash % limit
+        reusable = None
+        while True:
+            slot_key = keys[index]
+            if slot_key is _EMPTY:
+                return (index if reusable is None else reusable), False
+            if slot_key is _DELETED:
+                if reusable is None:
+                    reusable = index
+            elif hashes[index] == key_hash and (slot_key is key or slot_key == key):
+                return index, True
+            index = (index + 1) % limit
 
     def __setitem__(self, key, value):
         """
@@ -49,13 +214,33 @@ class dictionary:
         If the key exists, it overwrites the value.  Otherwise, it inserts the key/value pair.
         Last, it increases the length attribute and prompts a rehash check."""
 
-        index, pair = self.__finditem(key)
+        if self.__storage == "open":
+            key_hash = hash(key)
+            slot, found = self.__findslot(key, key_hash)
+            if not found:
+                if self.__keys[slot] is _EMPTY:         # Reused tombstones are already counted
+                    self.__used += 1
+                self.__hashes[slot] = key_hash
+                self.__keys[slot] = key
+                self.__length += 1
+                self.__version += 1
+            self.__values[slot] = value
+            if self.__length >= self.__limit * self.__grow_at:
+                self.__rehash(True)
+            elif self.__used >= self.__limit * self.__grow_at:     # Mostly tombstones: rebuild at the same size
+                self.__resize(self.__limit)
+            return
+
+        self.__step()
+        key_hash = hash(key)
+        _, pair = self.__finditem(key, key_hash)
         if pair:
-            pair[1] = value
+            pair[2] = value
         else:
-            self.__items[index].append([key,value])
+            self.__bucket(key_hash).append([key_hash, key, value])
             self.__length += 1
-            if self.__length >= self.__limit * .75:
+            self.__version += 1
+            if self.__length >= self.__limit * self.__grow_at:
                 self.__rehash(True)
 
     def __getitem__(self, key):
@@ -63,14 +248,24 @@ class dictionary:
         Calls __finditem() to determine correct index and check for existing key.
         If the key exists, it returns the value.  Otherwise, it raises an error. """
 
-        _, pair = self.__finditem(key)                  # Underscore denotes a placeholder variable that won't be used
+        if self.__storage == "open":
+            slot, found = self.__findslot(key, hash(key))
+            if found:
+                return self.__values[slot]
+            raise(KeyError("Key not found."))
+
+        self.__step()
+        _, pair = self.__finditem(key, hash(key))       # Underscore denotes a placeholder variable that won't be used
         if pair:
-            return pair[1]
+            return pair[2]
         raise(KeyError("Key not found."))
 
     def __contains__(self, key):
         ''' Implements the 'in' operator. '''
-        return self.__finditem(key)[1] is not None
+        if self.__storage == "open":
+            return self.__findslot(key, hash(key))[1]
+        self.__step()
+        return self.__finditem(key, hash(key))[1] is not None
 
     def __delitem__(self, key):
         """
@@ -78,43 +273,248 @@ class dictionary:
         If the key exists, it removes the pair.  Otherwise, it raises an error.
         Last, it decreases the length attribute and prompts a rehash check. """
 
-        index, pair = self.__finditem(key)
-        if not pair:
-            raise KeyError("Key not found.")
-        self.__items[index].remove(pair)
+        if self.__storage == "open":
+            slot, found = self.__findslot(key, hash(key))
+            if not found:
+                raise KeyError("Key not found.")
+            self.__keys[slot] = _DELETED
+            self.__values[slot] = None                  # Release the value; the tombstone keeps the probe chain intact
+        else:
+            self.__step()
+            bucket, pair = self.__finditem(key, hash(key))
+            if not pair:
+                raise KeyError("Key not found.")
+            bucket.remove(pair)
         self.__length -= 1
-        if self.__length <= self.__limit * .25:
+        self.__version += 1
+        if self.__length <= self.__limit * self.__shrink_at and self.__can_halve():
             self.__rehash(False)
 
+    def __can_halve(self):
+        ''' Checks the halved limit against min_limit and any reservation. '''
+        half = int(self.__limit / 2)
+        return half >= self.__min_limit and self.__reserved < half * self.__grow_at
+
+    def __fit(self, count):
+        """
+        Returns the limit reached by doubling or halving the current one until count
+        entries fit below the grow threshold, without going under min_limit. """
+
+        limit = self.__limit
+        while count >= limit * self.__grow_at:
+            limit *= 2
+        while int(limit / 2) >= self.__min_limit and count < int(limit / 2) * self.__grow_at:
+            limit = int(limit / 2)
+        return limit
+
+    def reserve(self, count):
+        """
+        Sizes the table once so that count entries fit without any further growth.
+        The table will not shrink below that size until shrink_to_fit() is called. """
+
+        self.__reserved = max(self.__reserved, count)
+        limit = self.__limit
+        while count >= limit * self.__grow_at:
+            limit *= 2
+        if limit != self.__limit:
+            self.__finish_migration()
+            self.__resize(limit)
+
+    def shrink_to_fit(self):
+        """
+        Drops any reservation and resizes to the smallest limit that holds the current
+        entries.  Open-addressing storage is rebuilt even at the same size to clear tombstones. """
+
+        self.__reserved = 0
+        limit = self.__fit(self.__length)
+        if limit != self.__limit or self.__storage == "open":
+            self.__finish_migration()
+            self.__resize(limit)
+
+    def update(self, other):
+        """
+        Inserts every pair from other, which may be a mapping with items() or any
+        iterable of key/value pairs.  The table is sized once for the whole load and the
+        entries are placed directly, without a threshold check per item.
+        Iterables without a length are read into a list first so they can be counted. """
+
+        pairs = other.items() if hasattr(other, "items") else other
+        try:
+            count = len(pairs)
+        except TypeError:
+            pairs = list(pairs)
+            count = len(pairs)
+
+        self.__finish_migration()
+        needed = self.__length if self.__storage == "chained" else self.__used
+        before = limit = self.__limit
+        while needed + count >= limit * self.__grow_at:
+            limit *= 2
+        if limit == before:
+            self.__place(pairs)
+            return
+        self.__resize(limit)
+        self.__place(pairs)
+        if self.__length <= limit * self.__shrink_at:   # Mostly duplicate keys: give back the extra room
+            self.__resize(max(before, self.__fit(self.__length)))
+
+    def __place(self, pairs):
+        """
+        Stores each pair in the current table without checking the load factor.
+        The caller must already have sized the table for every pair. """
+
+        self.__version += 1
+        if self.__storage == "chained":
+            for key, value in pairs:
+                key_hash = hash(key)
+                _, pair = self.__finditem(key, key_hash)
+                if pair:
+                    pair[2] = value
+                else:
+                    self.__bucket(key_hash).append([key_hash, key, value])
+                    self.__length += 1
+            return
+
+        hashes, keys, values = self.__hashes, self.__keys, self.__values
+        for key, value in pairs:
+            key_hash = hash(key)
+            slot, found = self.__findslot(key, key_hash)
+            if not found:
+                if keys[slot] is _EMPTY:
+                    self.__used += 1
+                hashes[slot] = key_hash
+                keys[slot] = key
+                self.__length += 1
+            values[slot] = value
+
+    def __finish_migration(self):
+        ''' Completes any incremental resize still in progress. '''
+        if self.__old_items is not None:
+            self.__migrate(self.__old_limit)
+
     def __rehash(self, increase):
         """
-        Doubles or halves the limit attribute based on the passed increase boolean.
-        Saves a temporary copy of the dictionary and empties the target dictionary.
-        Reinserts each pair from the copy back into the dictionary with the new hash limit """
+        Doubles or halves the limit attribute based on the passed increase boolean,
+        then rebuilds the storage with the new limit.
+        In incremental mode the current buckets are kept as the old table instead, and
+        each later operation migrates _MIGRATE_STEP of them.  Eight buckets per operation
+        always empties the old table before the next resize is due. """
 
         if increase:
-            self.__limit *= 2
+            limit = self.__limit * 2
         else:
-            self.__limit = int(self.__limit / 2)
+            limit = int(self.__limit / 2)
 
-        flat_list = self.__flattened()
-        self.__items = [[] for _ in range(self.__limit)]
-        self.__length = 0
+        if not self.__incremental:
+            self.__resize(limit)
+            return
+        self.__finish_migration()
+        self.__old_items, self.__old_limit = self.__items, self.__limit
+        self.__migrated = 0
+        self.__limit = limit
+        self.__allocate()
+
+    def __resize(self, limit):
+        """
+        Redistributes every entry into storage sized to the new hash limit.
+        Entries are placed by their stored hash, so neither hash() nor __eq__ is called
+        on any key.  Open-addressing storage also drops all of its tombstones. """
 
-        for key,value in flat_list:
-            self.__setitem__(key, value)
+        if self.__storage == "chained":
+            old_items = self.__items
+            self.__limit = limit
+            self.__allocate()
+            for inner in old_items:
+                if inner:
+                    for pair in inner:
+                        self.__bucket(pair[0]).append(pair)
+            return
+
+        hashes, keys, values = self.__hashes, self.__keys, self.__values
+        self.__limit = limit
+        self.__allocate()
+        new_hashes, new_keys, new_values = self.__hashes, self.__keys, self.__values
+        for index, key in enumerate(keys):
+            if key is _EMPTY or key is _DELETED:
+                continue
+            key_hash = hashes[index]
+            slot = key_hash % limit
+            while new_keys[slot] is not _EMPTY:         # Keys are unique, so only an empty slot is needed
+                slot = (slot + 1) % limit
+            new_hashes[slot] = key_hash
+            new_keys[slot] = key
+            new_values[slot] = values[index]
+        self.__used = self.__length
 
     def keys(self):
-        '''  Returns all keys. '''
-        return [item[0] for inner in self.__items for item in inner]
+        '''  Returns a live view of all keys. '''
+        return dictionary_keys(self)
 
     def values(self):
-        '''  Returns all values. '''
-        return [item[1] for inner in self.__items for item in inner]
+        '''  Returns a live view of all values. '''
+        return dictionary_values(self)
 
     def items(self):
-        '''  Returns all key/value pairs as tuples. '''
-        return [(item[0], item[1]) for inner in self.__items for item in inner]
+        '''  Returns a live view of all key/value pairs as tuples. '''
+        return dictionary_items(self)
+
+    def save(self, stream):
+        """
+        Writes a checkpoint to a binary stream: a header with the entry count, then each
+        key and value encoded by _encode() behind their lengths.  Output is buffered in
+        blocks, so the table is never copied.  Keys and values must be str, bytes, int or float. """
+
+        stream.write(_CHECKPOINT.pack(_CHECKPOINT_MAGIC, 1, self.__length))
+        _write_records(stream, self._entries())
+
+    @classmethod
+    def load(cls, stream, **options):
+        """
+        Reads a checkpoint written by save() into a new dictionary built with the given
+        constructor options.  The table is sized once from the header, and entries are
+        placed straight from the stream as they are decoded.  Keys in a checkpoint are
+        distinct, so no entry is compared against the others.  The cyclic garbage collector
+        is paused meanwhile, since every object created is kept. """
+
+        count = _read_checkpoint_header(stream)
+        result = cls(**options)
+        limit = result.__limit
+        while count >= limit * result.__grow_at:
+            limit *= 2
+        if limit != result.__limit:
+            result.__resize(limit)
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            result.__place_distinct(_read_records(stream, count))
+        finally:
+            if collecting:
+                gc.enable()
+        return result
+
+    def __place_distinct(self, pairs):
+        """
+        Stores pairs whose keys are known to be distinct and absent, in a table already
+        sized for them, by hash alone. """
+
+        self.__version += 1
+        if self.__storage == "chained":
+            for key, value in pairs:
+                key_hash = hash(key)
+                self.__bucket(key_hash).append([key_hash, key, value])
+                self.__length += 1
+            return
+        hashes, keys, values, limit = self.__hashes, self.__keys, self.__values, self.__limit
+        for key, value in pairs:
+            key_hash = hash(key)
+            slot = key_hash % limit
+            while keys[slot] is not _EMPTY:
+                slot = (slot + 1) % limit
+            hashes[slot] = key_hash
+            keys[slot] = key
+            values[slot] = value
+            self.__length += 1
+            self.__used += 1
 
     def __eq__(self, other):
         """
@@ -126,15 +526,1079 @@ class dictionary:
 
         if len(self) != len(other):
             return False
-        for each in self.__items:
-            for key, value in each:
-                if not other.__contains__(key):
+        for key, value in self.__pairs():
+            if not other.__contains__(key):
+                return False
+            else:
+                if value != other[key]:
                     return False
-                else:
-                    if value != other[key]:
-                        return False
         return True
 
+class _view(object):
+    """
+    Shared behaviour for the dictionary views.
+    A view compares equal to a list holding the same elements in iteration order,
+    so code written when keys(), values() and items() returned lists keeps working. """
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return list(self) == other
+        return super(_view, self).__eq__(other)
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, list(self))
+
+class dictionary_keys(_view, KeysView):
+    ''' Set-like view of a dictionary's keys, like dict_keys. '''
+    __slots__ = ()
+
+    def __iter__(self):
+        for key, _ in self._mapping._entries():
+            yield key
+
+class dictionary_values(_view, ValuesView):
+    ''' View of a dictionary's values, like dict_values. '''
+    __slots__ = ()
+
+    def __iter__(self):
+        for _, value in self._mapping._entries():
+            yield value
+
+    def __contains__(self, value):
+        for each in self:
+            if each is value or each == value:
+                return True
+        return False
+
+class dictionary_items(_view, ItemsView):
+    ''' Set-like view of a dictionary's (key, value) pairs, like dict_items. '''
+    __slots__ = ()
+
+    def __iter__(self):
+        return self._mapping._entries()
+
+_MAGIC = b"CS2050DM"
+_HEADER = struct.Struct("<8sII5Q")                      # magic, version, flags, capacity, length, used, data end, dead bytes
+_TABLE_START = 64                                       # Slots begin after the padded header
+_SLOT = struct.Struct("<QQ")                            # key hash, record offset
+_RECORD = struct.Struct("<II")                          # encoded key length, encoded value length
+_COMPACT_MIN = 1 << 20                                  # Least dead heap bytes worth a compaction
+_FREE, _GONE = 0, 1                                     # Record offsets reserved for empty slots and tombstones
+_DIRTY, _MOVED = 1, 2                                   # Header flags
+
+def _encode(obj):
+    """
+    Encodes a str, bytes, int or float as a one-byte type tag followed by its payload.
+    Persistent keys compare by their encoding, so 1 and 1.0 are different keys. """
+
+    kind = type(obj)
+    if kind is str:
+        return b"s" + obj.encode("utf-8")
+    if kind is bytes:
+        return b"b" + obj
+    if kind is int:
+        return b"i" + obj.to_bytes(obj.bit_length() // 8 + 1, "big", signed=True)
+    if kind is float:
+        return b"f" + struct.pack(">d", obj)
+    raise TypeError("Persistent keys and values must be str, bytes, int or float.")
+
+def _decode(data):
+    ''' Reverses _encode(). '''
+    tag, payload = data[:1], data[1:]
+    if tag == b"s":
+        return payload.decode("utf-8")
+    if tag == b"b":
+        return payload
+    if tag == b"i":
+        return int.from_bytes(payload, "big", signed=True)
+    if tag == b"f":
+        return struct.unpack(">d", payload)[0]
+    raise ValueError("Unknown type tag in persistent record.")
+
+def _write_records(stream, pairs):
+    ''' Writes each encoded key/value pair behind its lengths, one block at a time. '''
+    block = bytearray()
+    for key, value in pairs:
+        key, value = _encode(key), _encode(value)
+        block += _RECORD.pack(len(key), len(value))
+        block += key
+        block += value
+        if len(block) >= _CHECKPOINT_BLOCK:
+            stream.write(block)
+            block = bytearray()
+    stream.write(block)
+
+def _read_checkpoint_header(stream):
+    ''' Validates a checkpoint header and returns its entry count. '''
+    header = stream.read(_CHECKPOINT.size)
+    if len(header) < _CHECKPOINT.size:
+        raise ValueError("Truncated dictionary checkpoint.")
+    magic, version, count = _CHECKPOINT.unpack(header)
+    if magic != _CHECKPOINT_MAGIC or version != 1:
+        raise ValueError("Not a dictionary checkpoint.")
+    return count
+
+def _read_records(stream, count):
+    """
+    Yields count decoded (key, value) pairs from a stream, reading a block at a time.
+    Raises ValueError if the stream ends early. """
+
+    block, start = b"", 0
+
+    def fill(size):
+        ''' Makes sure size unread bytes are buffered and returns the buffer. '''
+        nonlocal block, start
+        if len(block) - start < size:
+            block = block[start:] + stream.read(max(size, _CHECKPOINT_BLOCK))
+            start = 0
+            if len(block) < size:
+                raise ValueError("Truncated dictionary checkpoint.")
+        return block
+
+    unpack = _RECORD.unpack_from
+    for _ in range(count):
+        if len(block) - start < _RECORD.size:
+            fill(_RECORD.size)
+        key_length, value_length = unpack(block, start)
+        start += _RECORD.size
+        if len(block) - start < key_length + value_length:
+            fill(key_length + value_length)
+        middle = start + key_length
+        start = middle + value_length
+        yield _decode(block[middle - key_length:middle]), _decode(block[middle:start])
+
+def _lock(handle):
+    ''' Takes an exclusive lock on an open file for a persistent_dictionary writer. '''
+    if fcntl is None:
+        return
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise BlockingIOError(errno.EWOULDBLOCK, "Persistent dictionary is open in another writer.")
+
+def _stable_hash(encoded):
+    ''' Hashes an encoded key the same way in every process, unlike hash() on str. '''
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little")
+
+class persistent_dictionary:
+    """
+    Open-addressing hash table laid out in a file and accessed through mmap.
+
+    The file holds a header, a table of (hash, record offset) slots, and an append-only
+    heap of records.  Each record is a key and a value encoded by _encode().  Opening a
+    file maps it without reading it, so lookups are served immediately at any size.
+
+    mode follows dbm:
+        "r":    read-only.  Open before forking to share the pages with every worker.
+        "w":    read-write on an existing file.
+        "c":    read-write, creating the file if needed.
+        "n":    read-write on a new, empty file.
+    Only one writer may have a file open at a time.  Writers take an exclusive flock() on
+    the file, and a second writer raises BlockingIOError instead of waiting.
+
+    Writes are ordered so that a crash never leaves a slot pointing at a partial record.
+    The record is appended first, then its offset is published in the slot.  A file
+    left dirty by a crashed writer is recounted the next time a writer opens it.  With
+    durable=True, each step is also flushed to disk before the next one starts.  A
+    resize writes a compacted copy next to the file and renames it into place.  A
+    compaction at the same capacity runs the same way once replaced and deleted records
+    take up more of the heap than live ones.  The old
+    file is then marked as moved, so readers still holding it reopen the path. """
+
+    def __init__(self, path, mode="c", capacity=16, durable=False):
+        if mode not in ("r", "w", "c", "n"):
+            raise ValueError("Mode must be 'r', 'w', 'c' or 'n'.")
+        self.__path = path
+        self.__writable = mode != "r"
+        self.__durable = durable
+        self.__version = 0
+        handle = None
+        if mode == "n" and os.path.exists(path):
+            with open(path, "rb") as existing:          # Never replace a file another writer holds
+                _lock(existing)
+                handle = self.__create(path, (), max(capacity, 8))
+        elif mode == "n" or (mode == "c" and not os.path.exists(path)):
+            handle = self.__create(path, (), max(capacity, 8))
+        self.__open(handle)
+
+    def __open(self, handle=None):
+        """
+        Maps the file and validates its header.  A writer locks the file first, unless
+        handle is a file from __create(), which is locked already. """
+
+        if handle is None:
+            handle = open(self.__path, "r+b" if self.__writable else "rb")
+            if self.__writable:
+                _lock(handle)
+        self.__file = handle
+        access = mmap.ACCESS_WRITE if self.__writable else mmap.ACCESS_READ
+        self.__mm = mmap.mmap(self.__file.fileno(), 0, access=access)
+        magic, version, flags, capacity = _HEADER.unpack_from(self.__mm, 0)[:4]
+        if magic != _MAGIC or version != 1:
+            self.close()
+            raise ValueError("Not a persistent dictionary file.")
+        self.__capacity = capacity
+        self.__heap_start = _TABLE_START + capacity * _SLOT.size
+        if self.__writable:
+            if flags & _DIRTY:
+                self.__recover()
+            self.__set_flags(_DIRTY)
+
+    def __create(self, path, records, capacity):
+        """
+        Writes a complete file holding the given encoded (hash, key, value) records,
+        under a locked temporary name that is then renamed over path.  Records are
+        streamed into the heap as they arrive and only the slot table is kept in memory,
+        so rewriting a large file needs about as much memory as its table.
+        Returns the new file, open for reading and writing and still locked. """
+
+        heap_start = _TABLE_START + capacity * _SLOT.size
+        table = bytearray(capacity * _SLOT.size)
+        temp = path + ".tmp"
+        handle = os.fdopen(os.open(temp, os.O_RDWR | os.O_CREAT, 0o666), "r+b")
+        try:
+            _lock(handle)                               # Truncated only once no one else is writing it
+            handle.truncate()
+            handle.seek(heap_start)
+            count, data_end = 0, heap_start
+            for key_hash, key, value in records:
+                index = key_hash % capacity
+                while _SLOT.unpack_from(table, index * _SLOT.size)[1] != _FREE:
+                    index = (index + 1) % capacity
+                _SLOT.pack_into(table, index * _SLOT.size, key_hash, data_end)
+                handle.write(_RECORD.pack(len(key), len(value)))
+                handle.write(key)
+                handle.write(value)
+                data_end += _RECORD.size + len(key) + len(value)
+                count += 1
+            handle.seek(0)
+            handle.write(_HEADER.pack(_MAGIC, 1, 0, capacity, count, count, data_end, 0).ljust(_TABLE_START, b"\0"))
+            handle.write(table)
+            handle.flush()
+            os.fsync(handle.fileno())
+            os.replace(temp, path)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    def __header(self):
+        """
+        Returns (flags, length, used, data end, dead bytes) from the mapped header.
+        Dead bytes count the heap space held by replaced and deleted records.  Files
+        written before it was tracked hold zero there, from the header padding. """
+
+        _, _, flags, _, length, used, data_end, dead = _HEADER.unpack_from(self.__mm, 0)
+        return flags, length, used, data_end, dead
+
+    def __write_header(self, length, used, data_end, dead):
+        flags = self.__header()[0]
+        _HEADER.pack_into(self.__mm, 0, _MAGIC, 1, flags, self.__capacity, length, used, data_end, dead)
+
+    def __set_flags(self, flags):
+        struct.pack_into("<I", self.__mm, 12, flags)
+        self.__mm.flush(0, min(mmap.PAGESIZE, len(self.__mm)))
+
+    def __recover(self):
+        ''' Recounts the header fields from the table after a writer crashed. '''
+        length = used = live = 0
+        data_end = self.__heap_start
+        for index in range(self.__capacity):
+            offset = _SLOT.unpack_from(self.__mm, _TABLE_START + index * _SLOT.size)[1]
+            if offset != _FREE:
+                used += 1
+            if offset > _GONE:
+                length += 1
+                size = self.__record_size(offset)
+                live += size
+                data_end = max(data_end, offset + size)
+        self.__write_header(length, used, data_end, data_end - self.__heap_start - live)
+
+    def __current(self):
+        ''' Reopens the path if a writer has replaced the file this reader maps. '''
+        if not self.__writable and self.__mm[12] & _MOVED:
+            self.close()
+            self.__open()
+
+    def __find(self, key):
+        """
+        Probes the table linearly for an encoded key.
+        Returns the slot index and record offset, or the first reusable slot and _FREE. """
+
+        mm, capacity = self.__mm, self.__capacity
+        key_hash = _stable_hash(key)
+        index = key_hash % capacity
+        reusable = None
+        while True:
+            slot_hash, offset = _SLOT.unpack_from(mm, _TABLE_START + index * _SLOT.size)
+            if offset == _FREE:
+                return (index if reusable is None else reusable), _FREE
+            if offset == _GONE:
+                if reusable is None:
+                    reusable = index
+            elif slot_hash == key_hash:
+                mm = self.__record(offset)
+                key_length = _RECORD.unpack_from(mm, offset)[0]
+                start = offset + _RECORD.size
+                if mm[start:start + key_length] == key:
+                    return index, offset
+            index = (index + 1) % capacity
+
+    def __remap(self):
+        self.__mm.close()
+        self.__mm = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __record(self, offset):
+        """
+        Returns a mapping that holds the whole record at offset, remapping first if a
+        writer appended it after this reader mapped the file. """
+
+        mm = self.__mm
+        if offset + _RECORD.size > len(mm):
+            self.__remap()
+            mm = self.__mm
+        key_length, value_length = _RECORD.unpack_from(mm, offset)
+        if offset + _RECORD.size + key_length + value_length > len(mm):
+            self.__remap()
+            mm = self.__mm
+        return mm
+
+    def __record_size(self, offset):
+        key_length, value_length = _RECORD.unpack_from(self.__mm, offset)
+        return _RECORD.size + key_length + value_length
+
+    def __value(self, offset):
+        ''' Decodes the value of the record at offset. '''
+        mm = self.__record(offset)
+        key_length, value_length = _RECORD.unpack_from(mm, offset)
+        start = offset + _RECORD.size + key_length
+        return _decode(mm[start:start + value_length])
+
+    def __len__(self):
+        self.__current()
+        return self.__header()[1]
+
+    def __getitem__(self, key):
+        self.__current()
+        _, offset = self.__find(_encode(key))
+        if offset == _FREE:
+            raise KeyError("Key not found.")
+        return self.__value(offset)
+
+    def __contains__(self, key):
+        self.__current()
+        return self.__find(_encode(key))[1] != _FREE
+
+    def __sync(self, start, end):
+        ''' Flushes the pages covering [start, end) when durable writes were requested. '''
+        if self.__durable:
+            start -= start % mmap.ALLOCATIONGRANULARITY
+            self.__mm.flush(start, end - start)
+
+    def __check_writable(self):
+        if not self.__writable:
+            raise PermissionError("Persistent dictionary is open read-only.")
+
+    def __setitem__(self, key, value):
+        """
+        Appends a new record, then points the key's slot at it.
+        Replacing a value leaves the old record behind as dead bytes, which the next
+        resize or compaction reclaims. """
+
+        self.__check_writable()
+        key, value = _encode(key), _encode(value)
+        index, offset = self.__find(key)
+        _, length, used, data_end, dead = self.__header()
+
+        record = _RECORD.pack(len(key), len(value)) + key + value
+        end = data_end + len(record)
+        if end > len(self.__mm):
+            self.__mm.resize(max(end, 2 * len(self.__mm)))
+        self.__mm[data_end:end] = record
+        self.__write_header(length, used, end, dead)    #   Claim the space before publishing it
+        self.__sync(data_end, end)
+
+        position = _TABLE_START + index * _SLOT.size
+        if offset == _FREE:
+            if _SLOT.unpack_from(self.__mm, position)[1] == _FREE:
+                used += 1
+            length += 1
+            self.__version += 1
+            struct.pack_into("<Q", self.__mm, position, _stable_hash(key))
+        else:
+            dead += self.__record_size(offset)
+        struct.pack_into("<Q", self.__mm, position + 8, data_end)
+        self.__sync(position, position + _SLOT.size)
+        self.__write_header(length, used, end, dead)
+
+        if used >= self.__capacity * .75:
+            self.__resize(self.__capacity * 2 if length >= self.__capacity / 2 else self.__capacity)
+        elif self.__wasteful(end, dead):
+            self.__resize(self.__capacity)
+
+    def __delitem__(self, key):
+        self.__check_writable()
+        index, offset = self.__find(_encode(key))
+        if offset == _FREE:
+            raise KeyError("Key not found.")
+        position = _TABLE_START + index * _SLOT.size
+        struct.pack_into("<Q", self.__mm, position + 8, _GONE)
+        self.__sync(position, position + _SLOT.size)
+        _, length, used, data_end, dead = self.__header()
+        dead += self.__record_size(offset)
+        self.__write_header(length - 1, used, data_end, dead)
+        self.__version += 1
+        if self.__wasteful(data_end, dead):
+            self.__resize(self.__capacity)
+
+    def __wasteful(self, data_end, dead):
+        """
+        Checks whether dead records outweigh the live heap and the slot table, so that
+        a compaction costs no more than the writes that made the garbage.
+        At least _COMPACT_MIN dead bytes are needed, so small tables are not rewritten often. """
+
+        live = data_end - self.__heap_start - dead
+        return dead >= max(_COMPACT_MIN, live, self.__capacity * _SLOT.size)
+
+    def __records(self):
+        ''' Yields the (hash, encoded key, encoded value) of every live slot. '''
+        for index in range(self.__capacity):
+            key_hash, offset = _SLOT.unpack_from(self.__mm, _TABLE_START + index * _SLOT.size)
+            if offset > _GONE:
+                mm = self.__record(offset)
+                key_length, value_length = _RECORD.unpack_from(mm, offset)
+                start = offset + _RECORD.size
+                yield key_hash, mm[start:start + key_length], mm[start + key_length:start + key_length + value_length]
+
+    def __resize(self, capacity):
+        """
+        Writes a compacted copy with the new capacity, renames it over the file,
+        marks the old mapping as moved for readers and maps the new file.
+        The new file is locked before the rename, so no other writer can claim it. """
+
+        handle = self.__create(self.__path, self.__records(), capacity)
+        self.__set_flags(_MOVED)
+        self.close()
+        self.__version += 1
+        self.__open(handle)
+
+    def _entries(self):
+        """
+        Yields each decoded key/value pair by walking the table.
+        Raises RuntimeError if the dictionary is structurally modified mid-iteration. """
+
+        self.__current()
+        version = self.__version
+        for _, key, value in self.__records():
+            yield _decode(key), _decode(value)
+            if self.__version != version:
+                raise RuntimeError("dictionary changed during iteration")
+
+    def __iter__(self):
+        return([key, value] for key, value in self._entries())
+
+    def keys(self):
+        '''  Returns a live view of all keys. '''
+        return dictionary_keys(self)
+
+    def values(self):
+        '''  Returns a live view of all values. '''
+        return dictionary_values(self)
+
+    def items(self):
+        '''  Returns a live view of all key/value pairs as tuples. '''
+        return dictionary_items(self)
+
+    def flush(self):
+        ''' Writes every mapped change to disk. '''
+        self.__mm.flush()
+
+    def close(self):
+        ''' Marks a writer's file clean, then releases the mapping and the file. '''
+        if self.__mm.closed:
+            return
+        if self.__writable and not self.__header()[0] & _MOVED:
+            self.__mm.flush()
+            self.__set_flags(0)
+        self.__mm.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class concurrent_dictionary:
+    """
+    Thread-safe dictionary on the chained layout, with buckets guarded by striped locks.
+
+    Each bucket is a tuple of (hash, key, value) entries.  A write replaces the whole
+    tuple, so readers take no lock and always see either the old bucket or the new one.
+    Writers lock only the stripe that owns their bucket.  A resize holds every stripe
+    while it builds the new table on the side, then installs it with one assignment.
+    Readers keep using the old table until that assignment and are never blocked.
+    Iteration walks a snapshot of the table and never raises for concurrent changes. """
+
+    def __init__(self, init=None, stripes=16):
+        if stripes < 1:
+            raise ValueError("At least one stripe is required.")
+        self.__locks = [threading.Lock() for _ in range(stripes)]
+        self.__counts = [0] * stripes                   # Entries per stripe, each guarded by its stripe lock
+        self.__resizing = threading.Lock()
+        self.__table = (10, [()] * 10)                  # (limit, buckets), replaced whole by a resize
+
+        if init:
+            for key, value in (init.items() if hasattr(init, "items") else init):
+                self.__setitem__(key, value)
+
+    def __len__(self):
+        return sum(self.__counts)
+
+    def __lock(self, key_hash):
+        """
+        Acquires the stripe lock for the key's bucket in the current table.
+        Retries if a resize replaced the table while waiting for the lock.
+        Returns the held lock, the stripe, the table and the bucket index. """
+
+        while True:
+            table = self.__table
+            index = key_hash % table[0]
+            stripe = index % len(self.__locks)
+            lock = self.__locks[stripe]
+            lock.acquire()
+            if self.__table is table:
+                return lock, stripe, table, index
+            lock.release()
+
+    def __getitem__(self, key):
+        limit, buckets = self.__table
+        key_hash = hash(key)
+        for entry in buckets[key_hash % limit]:
+            if entry[0] == key_hash and (entry[1] is key or entry[1] == key):
+                return entry[2]
+        raise(KeyError("Key not found."))
+
+    def __contains__(self, key):
+        ''' Implements the 'in' operator. '''
+        limit, buckets = self.__table
+        key_hash = hash(key)
+        for entry in buckets[key_hash % limit]:
+            if entry[0] == key_hash and (entry[1] is key or entry[1] == key):
+                return True
+        return False
+
+    def __setitem__(self, key, value):
+        key_hash = hash(key)
+        lock, stripe, table, index = self.__lock(key_hash)
+        try:
+            buckets = table[1]
+            bucket = buckets[index]
+            for position, entry in enumerate(bucket):
+                if entry[0] == key_hash and (entry[1] is key or entry[1] == key):
+                    buckets[index] = bucket[:position] + ((key_hash, key, value),) + bucket[position + 1:]
+                    return
+            buckets[index] = bucket + ((key_hash, key, value),)
+            self.__counts[stripe] += 1
+        finally:
+            lock.release()
+        if len(self) >= table[0] * .75:
+            self.__resize(table, table[0] * 2)
+
+    def __delitem__(self, key):
+        key_hash = hash(key)
+        lock, stripe, table, index = self.__lock(key_hash)
+        try:
+            buckets = table[1]
+            bucket = buckets[index]
+            for position, entry in enumerate(bucket):
+                if entry[0] == key_hash and (entry[1] is key or entry[1] == key):
+                    buckets[index] = bucket[:position] + bucket[position + 1:]
+                    self.__counts[stripe] -= 1
+                    break
+            else:
+                raise KeyError("Key not found.")
+        finally:
+            lock.release()
+        if len(self) <= table[0] * .25 and table[0] > 1:
+            self.__resize(table, int(table[0] / 2))
+
+    def __resize(self, table, limit):
+        """
+        Rebuilds the table with the new limit, placing entries by their stored hash.
+        Does nothing if another thread already replaced the table. """
+
+        with self.__resizing:
+            if self.__table is not table:
+                return
+            for lock in self.__locks:
+                lock.acquire()
+            try:
+                new_buckets = [[] for _ in range(limit)]
+                for bucket in table[1]:
+                    for entry in bucket:
+                        new_buckets[entry[0] % limit].append(entry)
+                counts = [0] * len(self.__locks)
+                for index, bucket in enumerate(new_buckets):
+                    counts[index % len(counts)] += len(bucket)
+                self.__counts = counts
+                self.__table = (limit, [tuple(bucket) for bucket in new_buckets])
+            finally:
+                for lock in self.__locks:
+                    lock.release()
+
+    def _entries(self):
+        ''' Yields each key/value pair from a snapshot of the current table. '''
+        for bucket in self.__table[1]:
+            for _, key, value in bucket:
+                yield key, value
+
+    def __iter__(self):
+        return([key, value] for key, value in self._entries())
+
+    def __str__(self):
+        return("[" + ", ".join(str([key, value]) for key, value in self._entries()) + "]")
+
+    def keys(self):
+        '''  Returns a live view of all keys. '''
+        return dictionary_keys(self)
+
+    def values(self):
+        '''  Returns a live view of all values. '''
+        return dictionary_values(self)
+
+    def items(self):
+        '''  Returns a live view of all key/value pairs as tuples. '''
+        return dictionary_items(self)
+
+def _shard_worker(connection):
+    """
+    Serves one shard of a sharded_dictionary from its own process.
+    Receives (operation, payload) batches and replies once per batch until told to stop. """
+
+    shard = dictionary()
+    while True:
+        operation, payload = connection.recv()
+        if operation == "get":
+            keys, default = payload
+            values = []
+            for key in keys:
+                try:
+                    values.append(shard[key])
+                except KeyError:
+                    values.append(default)
+            connection.send(values)
+        elif operation == "set":
+            shard.update(payload)
+            connection.send(None)
+        elif operation == "delete":
+            removed = 0
+            for key in payload:
+                if key in shard:
+                    del shard[key]
+                    removed += 1
+            connection.send(removed)
+        elif operation == "len":
+            connection.send(len(shard))
+        else:
+            connection.close()
+            return
+
+class sharded_dictionary:
+    """
+    Mapping partitioned by key hash across worker processes, each owning a dictionary shard.
+
+    Work is submitted in batches so that each round trip carries many operations.
+    A batch is split by shard, sent to every shard before any reply is read, and
+    the shards then run in parallel on separate cores.  Keys and values must be
+    picklable.  Keys are routed by hash() in this process, so a sharded_dictionary
+    cannot be handed to another process. """
+
+    def __init__(self, shards=None):
+        shards = shards or os.cpu_count() or 1
+        self.__connections = []
+        self.__workers = []
+        for _ in range(shards):
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_shard_worker, args=(child,), daemon=True)
+            worker.start()
+            child.close()
+            self.__connections.append(parent)
+            self.__workers.append(worker)
+
+    def __partition(self, items, key=lambda item: item):
+        ''' Splits items into one list per shard, with the positions they came from. '''
+        count = len(self.__connections)
+        groups = [[] for _ in range(count)]
+        positions = [[] for _ in range(count)]
+        for position, item in enumerate(items):
+            shard = hash(key(item)) % count
+            groups[shard].append(item)
+            positions[shard].append(position)
+        return groups, positions
+
+    def __broadcast(self, requests):
+        """
+        Sends one request per shard, skipping None, then collects the replies in order.
+        Every request is pickled before any is sent, so one that cannot be pickled raises
+        without leaving other shards with replies that nobody reads. """
+
+        payloads = [None if request is None else ForkingPickler.dumps(request) for request in requests]
+        for connection, payload in zip(self.__connections, payloads):
+            if payload is not None:
+                connection.send_bytes(payload)
+        return [connection.recv() if request is not None else None
+                for connection, request in zip(self.__connections, requests)]
+
+    def get_many(self, keys, default=None):
+        ''' Returns the value for each key, in order, with default for missing keys. '''
+        keys = list(keys)
+        groups, positions = self.__partition(keys)
+        replies = self.__broadcast([("get", (group, default)) if group else None for group in groups])
+        values = [default] * len(keys)
+        for reply, places in zip(replies, positions):
+            for place, value in zip(places, reply or ()):
+                values[place] = value
+        return values
+
+    def set_many(self, pairs):
+        ''' Stores every pair from a mapping or an iterable of key/value pairs. '''
+        pairs = list(pairs.items() if hasattr(pairs, "items") else pairs)
+        groups, _ = self.__partition(pairs, key=lambda pair: pair[0])
+        self.__broadcast([("set", group) if group else None for group in groups])
+
+    def delete_many(self, keys):
+        ''' Removes every key present and returns how many were removed. '''
+        groups, _ = self.__partition(list(keys))
+        replies = self.__broadcast([("delete", group) if group else None for group in groups])
+        return sum(reply or 0 for reply in replies)
+
+    def __len__(self):
+        return sum(self.__broadcast([("len", None)] * len(self.__connections)))
+
+    def close(self):
+        ''' Stops every worker process. '''
+        for connection, worker in zip(self.__connections, self.__workers):
+            if not connection.closed:
+                connection.send(("stop", None))
+                connection.close()
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class lru_policy(object):
+    ''' Evicts the least recently used key.  Recency lives in an OrderedDict, so each call is O(1). '''
+
+    def __init__(self):
+        self.__order = OrderedDict()
+
+    def add(self, key):
+        self.__order[key] = None
+
+    def touch(self, key):
+        self.__order.move_to_end(key)
+
+    def remove(self, key):
+        del self.__order[key]
+
+    def victim(self):
+        return next(iter(self.__order))
+
+class lfu_policy(object):
+    """
+    Evicts the least frequently used key, the oldest one among ties.
+    Keys sit in one OrderedDict per use count, with the lowest count tracked, so each
+    call is O(1).  Only a victim() following a remove() has to search for the lowest count. """
+
+    def __init__(self):
+        self.__counts = {}                              # key -> use count
+        self.__groups = {}                              # use count -> keys with that count, oldest first
+        self.__lowest = 0
+
+    def add(self, key):
+        self.__counts[key] = 1
+        self.__groups.setdefault(1, OrderedDict())[key] = None
+        self.__lowest = 1
+
+    def touch(self, key):
+        count = self.__counts[key]
+        self.__discard(key, count)
+        if self.__lowest == count and count not in self.__groups:
+            self.__lowest = count + 1
+        self.__counts[key] = count + 1
+        self.__groups.setdefault(count + 1, OrderedDict())[key] = None
+
+    def remove(self, key):
+        self.__discard(key, self.__counts.pop(key))
+
+    def __discard(self, key, count):
+        group = self.__groups[count]
+        del group[key]
+        if not group:
+            del self.__groups[count]
+
+    def victim(self):
+        if self.__lowest not in self.__groups:
+            self.__lowest = min(self.__groups)
+        return next(iter(self.__groups[self.__lowest]))
+
+class cache_dictionary(dictionary):
+    """
+    Bounded dictionary for memoization that evicts entries to stay within its limits.
+        max_entries:    Optional cap on the number of entries.
+        max_bytes:      Optional cap on the sys.getsizeof() of keys plus values (shallow sizes).
+        policy:         "lru", "lfu", or any object with add, touch, remove and victim methods.
+        ttl:            Default lifetime in seconds for new entries; set() can override it.
+        clock:          Time source for ttl, monotonic by default.
+    Expired entries are dropped when next looked up.  hits, misses, evictions and
+    expirations count traffic so that the limits can be sized from real use.
+    Remaining keyword arguments are passed to dictionary. """
+
+    def __init__(self, init=None, max_entries=None, max_bytes=None, policy="lru", ttl=None,
+                 clock=time.monotonic, **options):
+        if policy == "lru":
+            policy = lru_policy()
+        elif policy == "lfu":
+            policy = lfu_policy()
+        elif isinstance(policy, str):
+            raise ValueError("Policy must be 'lru', 'lfu' or a policy object.")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.__policy = policy
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__deadlines = {}                           # key -> expiry time, for entries with a ttl
+        self.__sizes = {}                               # key -> bytes charged against max_bytes
+        self.__bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        dictionary.__init__(self, None, **options)
+        if init:
+            self.update(init)
+
+    def __expired(self, key):
+        deadline = self.__deadlines.get(key)
+        return deadline is not None and self.__clock() >= deadline
+
+    def __discard(self, key):
+        ''' Removes an entry and all of its bookkeeping. '''
+        dictionary.__delitem__(self, key)
+        self.__policy.remove(key)
+        self.__deadlines.pop(key, None)
+        self.__bytes -= self.__sizes.pop(key, 0)
+
+    def __getitem__(self, key):
+        """
+        Returns the value and marks the entry as used.
+        Missing and expired keys count as misses and raise KeyError. """
+
+        try:
+            value = dictionary.__getitem__(self, key)
+        except KeyError:
+            self.misses += 1
+            raise
+        if self.__expired(key):
+            self.__discard(key)
+            self.expirations += 1
+            self.misses += 1
+            raise KeyError("Key not found.")
+        self.hits += 1
+        self.__policy.touch(key)
+        return value
+
+    def __contains__(self, key):
+        ''' Implements the 'in' operator without counting a hit or marking the entry as used. '''
+        if not dictionary.__contains__(self, key):
+            return False
+        if self.__expired(key):
+            self.__discard(key)
+            self.expirations += 1
+            return False
+        return True
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value, then evicts entries until the cache is back within its limits.
+        ttl overrides the default lifetime for this entry. """
+
+        existed = dictionary.__contains__(self, key)
+        if existed:
+            self.__policy.touch(key)
+        elif self.__max_entries is not None:
+            while len(self) >= self.__max_entries:      # Make room first so a new key is never its own victim
+                self.__discard(self.__policy.victim())
+                self.evictions += 1
+        dictionary.__setitem__(self, key, value)
+        if not existed:
+            self.__policy.add(key)
+
+        ttl = self.__ttl if ttl is None else ttl
+        if ttl is None:
+            self.__deadlines.pop(key, None)
+        else:
+            self.__deadlines[key] = self.__clock() + ttl
+        if self.__max_bytes is not None:
+            size = sys.getsizeof(key) + sys.getsizeof(value)
+            self.__bytes += size - self.__sizes.get(key, 0)
+            self.__sizes[key] = size
+        self.__evict()
+
+    def __evict(self):
+        while ((self.__max_entries is not None and len(self) > self.__max_entries) or
+               (self.__max_bytes is not None and self.__bytes > self.__max_bytes)):
+            self.__discard(self.__policy.victim())
+            self.evictions += 1
+
+    def __delitem__(self, key):
+        if not dictionary.__contains__(self, key):
+            raise KeyError("Key not found.")
+        self.__discard(key)
+
+    def update(self, other):
+        ''' Stores every pair through set(), since each insert may have to evict. '''
+        for key, value in (other.items() if hasattr(other, "items") else other):
+            self.set(key, value)
+
+    @classmethod
+    def load(cls, stream, **options):
+        """
+        Reads a checkpoint written by save() into a new cache built with the given options.
+        Every record goes through set(), so the policy, ttl and limits see each entry and
+        a checkpoint larger than max_entries keeps only its last entries. """
+
+        result = cls(**options)
+        result.update(_read_records(stream, _read_checkpoint_header(stream)))
+        return result
+
+class _costly_key(object):
+    ''' Key for benchmark_hashing whose hash and comparisons run in Python over a tuple. '''
+    __slots__ = ("parts", )
+    compares = 0
+
+    def __init__(self, parts):
+        self.parts = parts
+
+    def __hash__(self):
+        return hash(tuple(part for part in self.parts))
+
+    def __eq__(self, other):
+        _costly_key.compares += 1
+        return self.parts == other.parts
+
+def benchmark_hashing(count=200000, width=20):
+    """
+    Times a dictionary keyed by objects whose hash() and == run in Python over width
+    strings, so each call costs what it would for a large composite key.
+    Returns seconds for loading count keys through __setitem__ and for one forced
+    doubling by reserve(), then the seconds that doubling would add if it had to call
+    hash() on every key, then nanoseconds and __eq__ calls per lookup. """
+
+    keys = [_costly_key(tuple("%d-%d" % (i, j) for j in range(width))) for i in range(count)]
+    s = dictionary()
+    start = time.perf_counter()
+    for key in keys:
+        s[key] = None
+    loaded = time.perf_counter()
+    s.reserve(2 * len(s))
+    resized = time.perf_counter()
+    for key in keys:
+        hash(key)
+    hashed = time.perf_counter()
+    probes = [_costly_key(key.parts) for key in keys]  # Equal but not identical, so each hit calls __eq__
+    _costly_key.compares = 0
+    looking = time.perf_counter()
+    for key in probes:
+        s[key]
+    end = time.perf_counter()
+    return {"load": loaded - start, "resize": resized - loaded, "rehash keys": hashed - resized,
+            "lookup ns": (end - looking) * 1e9 / count, "compares per lookup": _costly_key.compares / count}
+
+def benchmark_update(sizes=(100000, 1000000), storage="chained"):
+    """
+    Times loading size int pairs one at a time through __setitem__, which resizes about
+    log2(size) times on the way, against the constructor's single bulk update().
+    The 10M and 50M pair cases need several GB of memory for the input and the table.
+    Returns a list of (size, per-item seconds, bulk seconds). """
+
+    results = []
+    for size in sizes:
+        pairs = [(i, i) for i in range(size)]
+        start = time.perf_counter()
+        s = dictionary(storage=storage)
+        for key, value in pairs:
+            s[key] = value
+        per_item = time.perf_counter() - start
+        del s
+        start = time.perf_counter()
+        s = dictionary(pairs, storage=storage)
+        bulk = time.perf_counter() - start
+        if len(s) != size:
+            raise AssertionError("Bulk load lost pairs.")
+        results.append((size, per_item, bulk))
+        del pairs, s
+    return results
+
+def benchmark_concurrent(threads=(1, 2, 4, 8), keys=20000, operations=400000, writes=.1):
+    """
+    Runs operations lookups and stores, writes of them stores, over keys keys, split
+    evenly across each number of threads.  Runs once against a dictionary behind one
+    global lock and once against a concurrent_dictionary.
+    Scaling with thread count shows only on a free-threaded build; under the GIL, the
+    gain is the time not spent waiting on the global lock.  sys._is_gil_enabled(),
+    where it exists, tells the two apart.
+    Returns a list of (threads, global-lock ops/s, concurrent ops/s). """
+
+    import random
+
+    def run(count, get, put):
+        generator = random.Random(2050)
+        share = operations // count
+        plans = [[(generator.random() < writes, generator.randrange(keys)) for _ in range(share)]
+                 for _ in range(count)]
+
+        def work(plan):
+            for write, key in plan:
+                if write:
+                    put(key, key)
+                else:
+                    get(key)
+
+        workers = [threading.Thread(target=work, args=(plan, )) for plan in plans]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return share * count / (time.perf_counter() - start)
+
+    results = []
+    for count in threads:
+        locked, lock = dictionary((key, key) for key in range(keys)), threading.Lock()
+
+        def locked_get(key):
+            with lock:
+                return locked[key]
+
+        def locked_put(key, value):
+            with lock:
+                locked[key] = value
+
+        striped = concurrent_dictionary((key, key) for key in range(keys))
+        results.append((count, run(count, locked_get, locked_put),
+                        run(count, striped.__getitem__, striped.__setitem__)))
+    return results
+
 ''' C-level work
 '''
 class test_add_two(unittest.TestCase):
@@ -274,5 +1738,619 @@ class test_eq(unittest.TestCase):
         self.assertTrue(s.__eq__(t))
         self.assertFalse(s.__eq__(u))
 
+''' Open-addressing storage
+    Same behaviour as the chained layout, stored in flat parallel arrays
+'''
+class test_open_storage(unittest.TestCase):
+    def test_basic(self):
+        s = dictionary(storage="open")
+        s[1] = "one"
+        s[2] = "two"
+        s[1] = "uno"
+        self.assertEqual(len(s), 2)
+        self.assertEqual(s[1], "uno")
+        self.assertEqual(s[2], "two")
+        self.assertRaises(KeyError, lambda: s[3])
+
+    def test_none_false_keys(self):
+        s = dictionary(storage="open")
+        s[None] = None
+        s[False] = False
+        self.assertTrue(None in s)
+        self.assertTrue(False in s)
+        self.assertEqual(s[None], None)
+
+    def test_collide(self):
+        s = dictionary(storage="open")
+        s[0] = "zero"
+        s[10] = "ten"
+        del s[0]
+        self.assertFalse(0 in s)
+        self.assertTrue(10 in s)            # Still reachable past the tombstone
+        self.assertEqual(s[10], "ten")
+
+    def test_rehash(self):
+        s = dictionary([(i,i) for i in range(10)], storage="open")
+        self.assertEqual(s._dictionary__limit, 20)
+        for i in range(8):
+            del s[i]
+        self.assertEqual(s._dictionary__limit, 5)
+        self.assertEqual(s.items(), [(8, 8), (9, 9)])
+
+    def test_tombstone_reuse(self):
+        s = dictionary(storage="open")
+        for i in range(1000):
+            s[i % 7] = i
+            del s[i % 7]
+        self.assertEqual(len(s), 0)
+        self.assertTrue(s._dictionary__used < s._dictionary__limit)
+
+    def test_matches_chained(self):
+        pairs = [(str(i), i) for i in range(500)]
+        s = dictionary(pairs)
+        t = dictionary(pairs, storage="open")
+        for i in range(0, 500, 3):
+            del s[str(i)]
+            del t[str(i)]
+        self.assertTrue(s == t)
+        self.assertEqual(sorted(s.keys()), sorted(t.keys()))
+
+    def test_invalid_storage(self):
+        self.assertRaises(ValueError, lambda: dictionary(storage="tree"))
+        self.assertRaises(ValueError, lambda: dictionary(storage="open", incremental=True))
+
+''' Incremental resizing
+    Old and new tables coexist while each operation migrates a few buckets
+'''
+class test_incremental(unittest.TestCase):
+    def test_grow(self):
+        s = dictionary(incremental=True)
+        for i in range(100):
+            s[i] = str(i)
+            self.assertEqual(len(s), i + 1)
+        for i in range(100):
+            self.assertEqual(s[i], str(i))
+        self.assertEqual(sorted(s.keys()), list(range(100)))
+
+    def test_migration_in_progress(self):
+        s = dictionary([(i, i) for i in range(7)], incremental=True)
+        s[7] = 7                                        # Crosses 75% and starts a resize
+        self.assertEqual(s._dictionary__limit, 20)
+        self.assertTrue(s._dictionary__old_items is not None)
+        self.assertTrue(3 in s)                         # Each operation moves eight of the ten old buckets
+        self.assertTrue(5 in s)
+        self.assertEqual(s._dictionary__old_items, None)
+        self.assertEqual(sorted(s.items()), [(i, i) for i in range(8)])
+
+    def test_shrink(self):
+        s = dictionary([(i, i) for i in range(200)], incremental=True)
+        for i in range(195):
+            del s[i]
+        self.assertEqual(len(s), 5)
+        self.assertRaises(KeyError, lambda: s[0])
+        self.assertEqual([s[i] for i in range(195, 200)], list(range(195, 200)))
+
+    def test_eq(self):
+        pairs = [(str(i), i) for i in range(300)]
+        self.assertTrue(dictionary(pairs, incremental=True) == dictionary(pairs))
+
+''' Cached hashes
+    Resizes place entries by their stored hash without calling hash() or __eq__
+'''
+class counted_key(object):
+    hashes = 0
+    compares = 0
+
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        counted_key.hashes += 1
+        return hash(self.value)
+
+    def __eq__(self, other):
+        counted_key.compares += 1
+        return self.value == other.value
+
+class test_cached_hash(unittest.TestCase):
+    def check(self, **options):
+        keys = [counted_key(i) for i in range(100)]
+        s = dictionary(**options)
+        counted_key.hashes = counted_key.compares = 0
+        for key in keys:
+            s[key] = key.value
+        self.assertEqual(counted_key.hashes, 100)       # One hash per insert, none during the resizes
+        self.assertEqual(counted_key.compares, 0)       # Distinct hashes never reach __eq__
+        for key in keys[:50]:
+            del s[key]
+        self.assertEqual(counted_key.hashes, 150)
+        self.assertEqual(s[keys[75]], 75)
+
+    def test_chained(self):
+        self.check()
+
+    def test_open(self):
+        self.check(storage="open")
+
+    def test_incremental(self):
+        self.check(incremental=True)
+
+    def test_benchmark(self):
+        results = benchmark_hashing(count=2000, width=2)
+        self.assertEqual(sorted(results), ["compares per lookup", "load", "lookup ns", "rehash keys", "resize"])
+        self.assertTrue(all(value >= 0 for value in results.values()))
+        self.assertEqual(results["compares per lookup"], 1)     # Other keys are ruled out by hash
+
+''' Resize policy
+    Configurable load factors, a minimum limit, reserve() and shrink_to_fit()
+'''
+class test_resize_policy(unittest.TestCase):
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: dictionary(grow_at=.5, shrink_at=.25))
+        self.assertRaises(ValueError, lambda: dictionary(grow_at=.75, shrink_at=.37))
+        self.assertRaises(ValueError, lambda: dictionary(storage="open", grow_at=1))
+        self.assertRaises(ValueError, lambda: dictionary(min_limit=0))
+
+    def test_load_factors(self):
+        s = dictionary(grow_at=2, shrink_at=.5)
+        for i in range(19):
+            s[i] = i
+        self.assertEqual(s._dictionary__limit, 10)
+        s[19] = 19
+        self.assertEqual(s._dictionary__limit, 20)
+
+    def test_no_thrashing(self):
+        def step(s, insert):
+            if insert:
+                s[len(s)] = None
+            else:
+                del s[len(s) - 1]
+
+        for grow_at, shrink_at in ((.75, .25), (.75, .275), (2, .9)):
+            for storage in ("chained", "open") if grow_at < 1 else ("chained",):
+                s = dictionary(storage=storage, grow_at=grow_at, shrink_at=shrink_at)
+                for grow, resizes in ((True, 4), (False, 2)):
+                    for _ in range(resizes):
+                        limit = s._dictionary__limit
+                        while s._dictionary__limit == limit:    # Stop right after a resize
+                            step(s, grow)
+                        limit = s._dictionary__limit
+                        for _ in range(5):                      # Undo the step that resized, then redo it
+                            step(s, not grow)
+                            self.assertEqual(s._dictionary__limit, limit)
+                            step(s, grow)
+                            self.assertEqual(s._dictionary__limit, limit)
+
+    def test_min_limit(self):
+        s = dictionary(min_limit=8)
+        s[1] = "one"
+        del s[1]
+        self.assertEqual(s._dictionary__limit, 10)
+
+    def test_reserve(self):
+        for storage in ("chained", "open"):
+            s = dictionary(storage=storage)
+            s.reserve(1000)
+            limit = s._dictionary__limit
+            self.assertEqual(limit, 2560)
+            for i in range(1000):
+                s[i] = i
+            self.assertEqual(s._dictionary__limit, limit)   # No intermediate rehash
+            for i in range(990):
+                del s[i]
+            self.assertEqual(s._dictionary__limit, limit)   # The reservation holds
+            s.shrink_to_fit()
+            self.assertEqual(s._dictionary__limit, 20)
+            self.assertEqual(sorted(s.keys()), list(range(990, 1000)))
+
+    def test_update(self):
+        for storage in ("chained", "open"):
+            s = dictionary([(1, "one")], storage=storage)
+            s.update({1: "uno", 2: "dos"})
+            s.update((i, i) for i in range(3, 30))
+            s.update(dictionary([(30, 30)]))
+            self.assertEqual(len(s), 30)
+            self.assertEqual(s[1], "uno")
+            self.assertEqual(s[29], 29)
+            self.assertEqual(s._dictionary__limit, 80)  # Sized once by doubling
+
+    def test_update_duplicates(self):
+        s = dictionary()
+        s.update([(1, i) for i in range(1000)])
+        self.assertEqual(len(s), 1)
+        self.assertEqual(s[1], 999)
+        self.assertEqual(s._dictionary__limit, 10)
+
+    def test_benchmark(self):
+        results = benchmark_update(sizes=(0, 1000), storage="open")
+        self.assertEqual([size for size, _, _ in results], [0, 1000])
+        self.assertTrue(all(per_item >= 0 and bulk >= 0 for _, per_item, bulk in results))
+
+    def test_reserve_incremental(self):
+        s = dictionary([(i, i) for i in range(8)], incremental=True)
+        s.reserve(100)
+        self.assertEqual(s._dictionary__old_items, None)
+        self.assertEqual(sorted(s.values()), list(range(8)))
+
+''' Views
+    keys(), values() and items() walk the table lazily and stay live
+'''
+class test_views(unittest.TestCase):
+    def setUp(self):
+        self.s = dictionary([(1, "one"), (2, "two"), (3, "three")])
+
+    def test_live(self):
+        keys = self.s.keys()
+        self.s[4] = "four"
+        self.assertEqual(len(keys), 4)
+        self.assertTrue(4 in keys)
+        self.assertTrue((4, "four") in self.s.items())
+        self.assertFalse((4, "five") in self.s.items())
+        self.assertTrue("four" in self.s.values())
+
+    def test_set_operations(self):
+        self.assertEqual(self.s.keys() & {2, 3, 5}, {2, 3})
+        self.assertEqual(self.s.keys() | {5}, {1, 2, 3, 5})
+        self.assertEqual(self.s.items() - {(1, "one")}, {(2, "two"), (3, "three")})
+        self.assertTrue(self.s.keys() == {1, 2, 3})
+
+    def test_iter_and_str(self):
+        self.assertEqual(list(self.s), [[1, "one"], [2, "two"], [3, "three"]])
+        self.assertEqual(str(self.s), "[[1, 'one'], [2, 'two'], [3, 'three']]")
+        self.assertEqual(repr(self.s.keys()), "dictionary_keys([1, 2, 3])")
+
+    def test_modified_during_iteration(self):
+        def insert():
+            for key in self.s.keys():
+                self.s[key + 10] = key
+        def delete():
+            for key, _ in self.s.items():
+                del self.s[key]
+        self.assertRaises(RuntimeError, insert)
+        self.assertRaises(RuntimeError, delete)
+
+    def test_overwrite_during_iteration(self):
+        for key in self.s.keys():
+            self.s[key] = key
+        self.assertEqual(self.s.values(), [1, 2, 3])
+
+    def test_open_storage(self):
+        s = dictionary([(1, "one"), (2, "two")], storage="open")
+        self.assertEqual(s.items(), [(1, "one"), (2, "two")])
+        self.assertRaises(RuntimeError, lambda: [s.__delitem__(k) for k in s.keys()])
+
+    def test_incremental_lookups_while_iterating(self):
+        s = dictionary([(i, i) for i in range(7)], incremental=True)
+        s[7] = 7                                        # Starts a resize
+        seen = [s[key] for key in s.keys()]             # Lookups must not migrate under the iterator
+        self.assertEqual(sorted(seen), list(range(8)))
+        self.assertTrue(s._dictionary__old_items is not None)
+        s[0] = 0
+        s[1] = 1
+        self.assertEqual(s._dictionary__old_items, None)
+
+''' Persistent storage
+    An mmap-backed table that survives the process and can be shared read-only
+'''
+class test_persistent(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "table.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        pairs = [("one", 1), (b"two", 2.5), (3, "three"), (-2**70, b"\x00"), (4.0, "four")]
+        with persistent_dictionary(self.path, "n") as s:
+            for key, value in pairs:
+                s[key] = value
+            s["one"] = "uno"
+        with persistent_dictionary(self.path, "r") as s:
+            self.assertEqual(len(s), 5)
+            self.assertEqual(s["one"], "uno")
+            self.assertEqual(s[b"two"], 2.5)
+            self.assertEqual(s[-2**70], b"\x00")
+            self.assertTrue(4.0 in s)
+            self.assertFalse(4 in s)                # Keys compare by encoding
+            self.assertRaises(KeyError, lambda: s["five"])
+            self.assertRaises(PermissionError, lambda: s.__setitem__("five", 5))
+
+    def test_unsupported_type(self):
+        with persistent_dictionary(self.path) as s:
+            self.assertRaises(TypeError, lambda: s.__setitem__((1, 2), 1))
+            self.assertRaises(TypeError, lambda: s.__setitem__(1, None))
+
+    def test_resize_and_delete(self):
+        with persistent_dictionary(self.path) as s:
+            for i in range(1000):
+                s[i] = str(i)
+            for i in range(0, 1000, 2):
+                del s[i]
+            self.assertEqual(len(s), 500)
+            self.assertEqual(sorted(s.keys()), list(range(1, 1000, 2)))
+            self.assertEqual(s[999], "999")
+            self.assertRaises(KeyError, lambda: s.__delitem__(0))
+
+    def test_reader_follows_writer(self):
+        writer = persistent_dictionary(self.path, durable=True)
+        writer["a"] = 1
+        reader = persistent_dictionary(self.path, "r")
+        for i in range(100):                        # Grows the heap and replaces the file
+            writer[i] = i
+        self.assertEqual(reader[99], 99)
+        self.assertEqual(len(reader), 101)
+        reader.close()
+        writer.close()
+
+    def test_overwrites_compact(self):
+        with persistent_dictionary(self.path) as s:
+            for i in range(1000):                   # 10 MB of records, all but one dead
+                s["k"] = b"x" * 9999 + bytes([i % 256])
+            s["other"] = 1
+            self.assertEqual(len(s), 2)
+            self.assertEqual(s["k"], b"x" * 9999 + bytes([999 % 256]))
+            self.assertLess(os.path.getsize(self.path), 5 << 20)
+            for i in range(200):
+                s[i] = b"y" * 10000
+            for i in range(200):
+                del s[i]
+            self.assertLess(os.path.getsize(self.path), 5 << 20)
+        with persistent_dictionary(self.path, "r") as s:
+            self.assertEqual(sorted(map(str, s.keys())), ["k", "other"])
+
+    def test_reader_follows_appends(self):
+        with persistent_dictionary(self.path) as writer:
+            writer["a"] = 1
+            with persistent_dictionary(self.path, "r") as reader:
+                key = "k" * 400                     # Header lands inside the reader's mapping, key bytes past it
+                writer[key] = 2
+                self.assertEqual(reader[key], 2)
+            with persistent_dictionary(self.path, "r") as reader:
+                for i in range(5):
+                    writer[i] = b"x" * 100000
+                self.assertEqual(sorted(map(str, reader.keys())), ["0", "1", "2", "3", "4", "a", key])
+                self.assertEqual(dict(reader.items())[4], b"x" * 100000)
+
+    def test_crash_recovery(self):
+        writer = persistent_dictionary(self.path)
+        for i in range(5):
+            writer[i] = i
+        struct.pack_into("<3Q", writer._persistent_dictionary__mm, 24, 0, 0, 0)  # Stale counts
+        writer.flush()
+        writer._persistent_dictionary__mm.close()   # Crash: the lock is released but the file stays dirty
+        writer._persistent_dictionary__file.close()
+        with persistent_dictionary(self.path, "w") as s:
+            self.assertEqual(len(s), 5)
+            s[5] = 5
+            self.assertEqual(s.items(), dict((i, i) for i in range(6)).items())
+
+    def test_single_writer(self):
+        with persistent_dictionary(self.path) as writer:
+            writer["a"] = 1
+            self.assertRaises(BlockingIOError, lambda: persistent_dictionary(self.path, "w"))
+            self.assertRaises(BlockingIOError, lambda: persistent_dictionary(self.path, "n"))
+            for i in range(100):                    # Still locked after the file is replaced
+                writer[i] = i
+            self.assertRaises(BlockingIOError, lambda: persistent_dictionary(self.path, "c"))
+            with persistent_dictionary(self.path, "r") as reader:
+                self.assertEqual(reader["a"], 1)
+        with persistent_dictionary(self.path, "w") as writer:
+            self.assertEqual(len(writer), 101)
+
+    def test_resize_streams(self):
+        import tracemalloc
+        with persistent_dictionary(self.path) as s:
+            for i in range(40):
+                s[i] = b"x" * (1 << 18)             # 10 MB of values
+            tracemalloc.start()
+            try:
+                s._persistent_dictionary__resize(s._persistent_dictionary__capacity * 2)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertLess(peak, 2 << 20)
+            self.assertEqual(s[39], b"x" * (1 << 18))
+
+''' Concurrent storage
+    Striped writer locks with lock-free readers
+'''
+class test_concurrent(unittest.TestCase):
+    def test_basic(self):
+        s = concurrent_dictionary([(1, "one"), (2, "two")], stripes=4)
+        s[1] = "uno"
+        del s[2]
+        self.assertEqual(len(s), 1)
+        self.assertEqual(s[1], "uno")
+        self.assertFalse(2 in s)
+        self.assertRaises(KeyError, lambda: s.__delitem__(2))
+        self.assertEqual(s.items(), [(1, "uno")])
+
+    def test_stress(self):
+        s = concurrent_dictionary()
+        errors = []
+        done = threading.Event()
+
+        def writer(start):
+            for i in range(start, start + 2000):
+                s[i] = i
+            for i in range(start, start + 2000, 2):
+                del s[i]
+
+        def reader():
+            while not done.is_set():
+                for key, value in s.items():
+                    if key != value:
+                        errors.append((key, value))
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        writers = [threading.Thread(target=writer, args=(n * 2000,)) for n in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(s), 4000)
+        self.assertEqual(sorted(s.keys()), list(range(1, 8000, 2)))
+
+    def test_benchmark(self):
+        results = benchmark_concurrent(threads=(1, 2), keys=100, operations=2000)
+        self.assertEqual([threads for threads, _, _ in results], [1, 2])
+        self.assertTrue(all(locked > 0 and striped > 0 for _, locked, striped in results))
+
+''' Sharded storage
+    Batched operations against dictionary shards in worker processes
+'''
+class test_sharded(unittest.TestCase):
+    def test_batches(self):
+        with sharded_dictionary(shards=2) as s:
+            s.set_many((i, str(i)) for i in range(1000))
+            s.set_many({0: "zero"})
+            self.assertEqual(len(s), 1000)
+            self.assertEqual(s.get_many([0, 999, 5, 1000]), ["zero", "999", "5", None])
+            self.assertEqual(s.delete_many(range(0, 1000, 2)), 500)
+            self.assertEqual(s.delete_many([0, 1]), 1)
+            self.assertEqual(s.get_many([0, 3], default=-1), [-1, "3"])
+            self.assertEqual(len(s), 499)
+
+    def test_unpicklable(self):
+        with sharded_dictionary(shards=2) as s:
+            s.set_many((i, i) for i in range(4))
+            self.assertRaises(TypeError, lambda: s.set_many([(0, "ok"), (1, threading.Lock())]))
+            self.assertEqual(s.get_many([0, 1, 2, 3]), [0, 1, 2, 3])  # Nothing from the failed batch was stored
+            self.assertEqual(len(s), 4)
+
+''' Bounded caches
+    Eviction policies, byte budgets, time-to-live and traffic counters
+'''
+class fake_clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+class test_cache(unittest.TestCase):
+    def test_lru(self):
+        s = cache_dictionary(max_entries=2)
+        s[1] = "one"
+        s[2] = "two"
+        s[1]
+        s[3] = "three"                                  # 2 is least recently used
+        self.assertEqual(sorted(s.keys()), [1, 3])
+        self.assertEqual((s.hits, s.misses, s.evictions), (1, 0, 1))
+        self.assertRaises(KeyError, lambda: s[2])
+        self.assertEqual(s.misses, 1)
+
+    def test_lfu(self):
+        s = cache_dictionary(max_entries=2, policy="lfu")
+        s[1] = "one"
+        s[2] = "two"
+        s[1]
+        s[1]
+        s[2]
+        s[3] = "three"                                  # 2 has fewer uses than 1
+        self.assertEqual(sorted(s.keys()), [1, 3])
+        s[3]
+        s[3]
+        del s[1]
+        s[4] = "four"
+        s[5] = "five"                                   # 4 has the fewest uses
+        self.assertEqual(sorted(s.keys()), [3, 5])
+
+    def test_ttl(self):
+        clock = fake_clock()
+        s = cache_dictionary(ttl=10, clock=clock)
+        s[1] = "one"
+        s.set(2, "two", ttl=100)
+        clock.now = 50
+        self.assertFalse(1 in s)
+        self.assertEqual(s[2], "two")
+        clock.now = 100
+        self.assertRaises(KeyError, lambda: s[2])
+        self.assertEqual(len(s), 0)
+        self.assertEqual((s.expirations, s.misses), (2, 1))
+
+    def test_max_bytes(self):
+        s = cache_dictionary(max_bytes=3 * (sys.getsizeof(0) + sys.getsizeof("x" * 10)))
+        for i in range(10):
+            s[i] = "x" * 10
+        self.assertEqual(len(s), 3)
+        self.assertEqual(sorted(s.keys()), [7, 8, 9])
+        self.assertEqual(s.evictions, 7)
+
+    def test_init_and_update(self):
+        s = cache_dictionary([(i, i) for i in range(10)], max_entries=5)
+        self.assertEqual(sorted(s.keys()), [5, 6, 7, 8, 9])
+        s.update({10: 10})
+        self.assertEqual(len(s), 5)
+        self.assertRaises(ValueError, lambda: cache_dictionary(policy="fifo"))
+
+''' Checkpoints
+    Compact binary save and streaming load
+'''
+class test_checkpoint(unittest.TestCase):
+    PAIRS = [(1, "one"), ("two", 2.5), (b"three", b"\x00\xff"), (-2 ** 70, ""), ("", -1)]
+
+    def round_trip(self, s, **options):
+        stream = io.BytesIO()
+        s.save(stream)
+        stream.seek(0)
+        return dictionary.load(stream, **options)
+
+    def test_round_trip(self):
+        for storage in ("chained", "open"):
+            s = dictionary(self.PAIRS, storage=storage)
+            loaded = self.round_trip(s, storage=storage)
+            self.assertTrue(loaded == s)
+            self.assertEqual(sorted(map(str, loaded.items())), sorted(map(str, self.PAIRS)))
+        loaded = self.round_trip(dictionary(self.PAIRS), incremental=True)
+        self.assertEqual(len(loaded), 5)
+        self.assertEqual(len(self.round_trip(dictionary())), 0)
+
+    def test_presized(self):
+        s = dictionary([(i, str(i)) for i in range(5000)])
+        stream = io.BytesIO()
+        s.save(stream)
+        self.assertLess(len(stream.getvalue()), 5000 * 20)
+        stream.seek(0)
+        loaded = dictionary.load(stream)
+        self.assertEqual(loaded._dictionary__limit, s._dictionary__limit)
+        self.assertEqual(loaded[4999], "4999")
+
+    def test_streams_in_blocks(self):
+        s = dictionary([(i, "x" * 100) for i in range(30000)])
+        stream = io.BytesIO()
+        s.save(stream)
+        self.assertGreater(len(stream.getvalue()), 2 * _CHECKPOINT_BLOCK)
+        stream.seek(0)
+        self.assertTrue(dictionary.load(stream) == s)
+
+    def test_errors(self):
+        self.assertRaises(TypeError, lambda: dictionary([(1, [1])]).save(io.BytesIO()))
+        self.assertRaises(ValueError, lambda: dictionary.load(io.BytesIO(b"not a checkpoint at all")))
+        stream = io.BytesIO()
+        dictionary(self.PAIRS).save(stream)
+        self.assertRaises(ValueError, lambda: dictionary.load(io.BytesIO(stream.getvalue()[:-3])))
+        self.assertRaises(ValueError, lambda: dictionary.load(io.BytesIO(stream.getvalue()[:10])))
+
+    def test_cache_round_trip(self):
+        stream = io.BytesIO()
+        dictionary([(i, str(i)) for i in range(5)]).save(stream)
+        stream.seek(0)
+        s = cache_dictionary.load(stream, max_entries=3)
+        self.assertIsInstance(s, cache_dictionary)
+        self.assertEqual(len(s), 3)
+        self.assertEqual(s[2], "2")
+        self.assertFalse(0 in s)
+        s[5] = "5"
+        self.assertEqual(len(s), 3)
+        self.assertFalse(3 in s)
+        self.assertEqual(s.evictions, 3)
+        self.assertEqual(s.hits, 1)
+
 if '__main__' == __name__:
     unittest.main()
\ No newline at end of file
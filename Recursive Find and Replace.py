@@ -1,4 +1,17 @@
 from __future__ import print_function
+from collections import deque
+from functools import lru_cache
+import argparse
+import fnmatch
+import io
+import mmap
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
 import unittest
 
 '''
@@ -13,26 +26,402 @@ Help provided:
 def findandreplace(find, replace, string, processed=""):
     """
     Replace all instances of find with replace in string.
-    Recursive approach:
-    If the string starts with find, return replace and findandreplace
-    with the rest of the string, else return the first character of the
-    string and findandreplace with the rest of the string
+    Iterative approach:
+    Search for each match with str.find, starting just past the previous
+    one, and collect the unchanged text between matches and the
+    replacements as pieces that are joined once at the end.
+    str.find never backtracks over the string, so the whole pass is linear.
     """
 
     if find is None or replace is None or string is None:
         return string
 
-    elif string == "":
-        return processed
+    if find == "":
+        return processed + string
 
+    pieces = [processed]
+    start = 0
+    position = string.find(find)
+    while position != -1:
+        pieces.append(string[start:position])
+        pieces.append(replace)
+        start = position + len(find)
+        position = string.find(find, start)
+    pieces.append(string[start:])
+    return "".join(pieces)
+
+
+class Replacer(object):
+    """
+    A set of find/replace rules compiled into one Aho-Corasick automaton.
+    replace() applies every rule in a single left-to-right pass.  Like
+    findandreplace, matches are leftmost and never overlap; where several
+    finds start at the same place, the longest wins.  Replacement text is
+    never searched again, so one rule's output cannot trigger another rule.
+    """
+
+    def __init__(self, mapping):
+        self.replacements = dict(mapping)
+        goto = [{}]                 # Trie edges: state -> {character: state}
+        depth = [0]                 # Length of the text each state stands for
+        longest = [0]               # Longest find ending at each state, or 0
+        for find in self.replacements:
+            state = 0
+            for character in find:
+                following = goto[state].get(character)
+                if following is None:
+                    following = goto[state][character] = len(goto)
+                    goto.append({})
+                    depth.append(depth[state] + 1)
+                    longest.append(0)
+                state = following
+            longest[state] = len(find)
+
+        fail = [0] * len(goto)      # Longest proper suffix that is also a trie state
+        queue = deque(goto[0].values())
+        while queue:                # Breadth-first, so every fail target is already done
+            state = queue.popleft()
+            for character, following in goto[state].items():
+                target = fail[state]
+                while target and character not in goto[target]:
+                    target = fail[target]
+                fail[following] = goto[target].get(character, 0)
+                longest[following] = longest[following] or longest[fail[following]]
+                queue.append(following)
+
+        self.goto, self.fail, self.depth, self.longest = goto, fail, depth, longest
+        self.starts = None          # Finds the next character that can begin a match
+        if goto[0]:
+            self.starts = re.compile("[" + "".join(re.escape(character) for character in goto[0]) + "]")
+
+    def replace(self, string, processed=""):
+        """
+        Apply every rule to string in one pass and return processed plus the result.
+        A match is kept as a candidate until no later match could start at or before
+        it, then replaced.  Text outside matches is copied in pieces, joined once.
+        """
+
+        if string is None:
+            return string
+        if self.starts is None:
+            return processed + string
+        goto, fail, depth, longest = self.goto, self.fail, self.depth, self.longest
+        pieces = [processed]
+        last = position = state = 0
+        match_start = match_end = -1
+        while True:
+            if match_start >= 0 and (position == len(string) or position - depth[state] > match_start):
+                pieces.append(string[last:match_start])
+                pieces.append(self.replacements[string[match_start:match_end]])
+                last = position = match_end
+                state, match_start = 0, -1
+                continue
+            if state == 0:          # Nothing under way: jump to the next possible start
+                found = self.starts.search(string, position)
+                if found is None:
+                    break
+                position = found.start()
+            character = string[position]
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            position += 1
+            if longest[state] and (match_start < 0 or position - longest[state] <= match_start):
+                match_start, match_end = position - longest[state], position
+            if position == len(string) and match_start < 0:
+                break
+        pieces.append(string[last:])
+        return "".join(pieces)
+
+
+@lru_cache(maxsize=64)
+def _compile(rules):
+    return Replacer(rules)
+
+
+def compile_replacer(mapping):
+    """
+    Return a Replacer for the rules in mapping, reusing the one compiled
+    for the same rules earlier.  Rules with a None or empty find, or a
+    None replace, are skipped, as findandreplace would skip them.  As with
+    dict(), the last rule for a repeated find wins.
+    """
+
+    items = mapping.items() if hasattr(mapping, "items") else mapping
+    rules = dict((find, replace) for find, replace in items if find and replace is not None)
+    return _compile(frozenset(rules.items()))
+
+
+def findandreplace_many(mapping, string, processed=""):
+    """
+    Replace every find in mapping with its replace, in a single pass over string.
+    mapping may be a dict, pairs of (find, replace), or a compiled Replacer.
+    """
+
+    if mapping is None or string is None:
+        return string
+    replacer = mapping if isinstance(mapping, Replacer) else compile_replacer(mapping)
+    return replacer.replace(string, processed)
+
+
+def _chunks(source, chunk_size):
+    """
+    Yield successive pieces of at most chunk_size from a file object, or
+    from anything that can be sliced, such as bytes, str or an mmap.
+    """
+
+    if hasattr(source, "read") and not isinstance(source, mmap.mmap):
+        chunk = source.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = source.read(chunk_size)
+    else:
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+
+
+def _like(value, sample):
+    """ Convert a str or bytes value to the type of sample, as UTF-8. """
+    if isinstance(sample, str):
+        return value.decode("utf-8") if isinstance(value, (bytes, bytearray)) else value
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+def findandreplace_stream(find, replace, source, sink, chunk_size=1 << 20):
+    """
+    Replace all instances of find with replace while copying source to sink,
+    holding at most one chunk and a short tail in memory at a time.
+    source is a file object, an mmap, bytes or a str; sink has a write method.
+    find and replace are converted to the type source yields, as UTF-8.
+    The last len(find) - 1 characters of each chunk are carried into the
+    next one, so a match across a chunk boundary is still found.
+    Returns the number of replacements.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    count = 0
+    carry = None
+    for chunk in _chunks(source, chunk_size):
+        if carry is None:                       # First chunk: settle the types
+            carry = chunk[:0]
+            if find is None or replace is None or len(find) == 0:
+                find = None
+            else:
+                find, replace = _like(find, chunk), _like(replace, chunk)
+        if find is None:
+            sink.write(chunk)
+            continue
+        buffer = carry + chunk
+        start = 0
+        position = buffer.find(find)
+        while position != -1:
+            sink.write(buffer[start:position])
+            sink.write(replace)
+            count += 1
+            start = position + len(find)
+            position = buffer.find(find, start)
+        keep = max(start, len(buffer) - len(find) + 1)
+        sink.write(buffer[start:keep])          # Nothing before keep can begin a match any more
+        carry = buffer[keep:]
+    if carry:
+        sink.write(carry)
+    return count
+
+
+def findandreplace_inplace(find, replace, target):
+    """
+    Replace all instances of find with replace directly in target, which is
+    a bytearray, a writable mmap, or a file opened for reading and writing
+    in binary mode (mapped for the duration).  Replacing text of a different
+    length would have to move everything after it, so find and replace must
+    have the same length once encoded as UTF-8.
+    Returns the number of replacements.
+    """
+
+    if find is None or replace is None or len(find) == 0:
+        return 0
+    find, replace = _like(find, b""), _like(replace, b"")
+    if len(find) != len(replace):
+        raise ValueError("In-place replacement requires find and replace of the same length.")
+    if hasattr(target, "fileno") and not isinstance(target, mmap.mmap):
+        target.flush()
+        if os.fstat(target.fileno()).st_size == 0:
+            return 0                            # Empty files cannot be mapped
+        with mmap.mmap(target.fileno(), 0) as mapped:
+            return findandreplace_inplace(find, replace, mapped)
+    count = 0
+    position = target.find(find)
+    while position != -1:
+        target[position:position + len(find)] = replace
+        count += 1
+        position = target.find(find, position + len(find))
+    return count
+
+
+# Version control directories, which findandreplace_tree never enters by default
+_VCS_DIRECTORIES = (".git", ".hg", ".svn", ".bzr", "CVS")
+
+
+def _rewrite_file(task):
+    """
+    Apply one replacement to one file for findandreplace_tree.
+    A file without the pattern, or with a NUL byte and so presumably binary,
+    is only scanned, through mmap, and left alone.
+    Otherwise the result is streamed to a temporary file beside it, which is
+    renamed over the original so readers never see a half-written file.
+    Returns (path, replacements, size in bytes, error), where error is the
+    OSError that stopped this file, or None.
+    """
+
+    path, find, replace, chunk_size = task
+    try:
+        size = os.path.getsize(path)
+        if size < len(find):
+            return path, 0, size, None
+        with open(path, "rb") as source:
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped.find(find) == -1 or mapped.find(b"\0") != -1:
+                    return path, 0, size, None
+                handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".findandreplace-")
+                try:
+                    with os.fdopen(handle, "wb") as sink:
+                        count = findandreplace_stream(find, replace, mapped, sink, chunk_size)
+                except BaseException:
+                    os.remove(temp)
+                    raise
+        try:                                    # Renamed only once the original is closed
+            shutil.copymode(path, temp)
+            os.replace(temp, path)
+        except BaseException:
+            os.remove(temp)
+            raise
+    except OSError as error:
+        return path, 0, 0, error
+    return path, count, size, None
+
+
+def _walk(root, include, exclude):
+    """
+    Yield the regular files under root whose path relative to root, or whose
+    name, matches an include glob and no exclude glob.  Directories matching an
+    exclude glob are not entered.  Symbolic links are skipped.
+    """
+
+    def matches(relative, patterns):
+        name = os.path.basename(relative)
+        return any(fnmatch.fnmatch(relative, pattern) or fnmatch.fnmatch(name, pattern)
+                   for pattern in patterns)
+
+    for directory, directories, files in os.walk(root):
+        base = os.path.relpath(directory, root)
+        relative = lambda name: name if base == os.curdir else os.path.join(base, name)
+        directories[:] = [name for name in directories if not matches(relative(name), exclude)]
+        for name in files:
+            path = os.path.join(directory, name)
+            if os.path.islink(path) or matches(relative(name), exclude):
+                continue
+            if matches(relative(name), include):
+                yield path
+
+
+def findandreplace_tree(find, replace, root, include=("*",), exclude=_VCS_DIRECTORIES,
+                        processes=None, chunk_size=1 << 20):
+    """
+    Replace all instances of find with replace in every file under root that
+    matches the include and exclude globs, spreading the files over a pool of
+    processes (one per core by default; 1 works in this process).
+    Version control directories are excluded unless exclude is overridden.
+    find and replace are encoded as UTF-8 and files are treated as bytes;
+    files containing a NUL byte are taken to be binary and left alone.
+    Returns a dict of {path: replacements} for the changed files, the bytes
+    scanned, the seconds taken and a dict of {path: OSError} for the files
+    that could not be read or rewritten.
+    """
+
+    start = time.perf_counter()
+    changed, scanned, failed = {}, 0, {}
+    if find is None or replace is None or len(find) == 0:
+        return changed, scanned, time.perf_counter() - start, failed
+    find, replace = _like(find, b""), _like(replace, b"")
+    tasks = ((path, find, replace, chunk_size) for path in _walk(root, include, exclude))
+    if processes == 1:
+        results = map(_rewrite_file, tasks)
+        pool = None
     else:
-        length = min(len(find),len(string))
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(_rewrite_file, tasks, chunksize=16)
+    try:
+        for path, count, size, error in results:
+            scanned += size
+            if count:
+                changed[path] = count
+            if error is not None:
+                failed[path] = error
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return changed, scanned, time.perf_counter() - start, failed
+
+
+def main(arguments=None):
+    """
+    Command line entry point for findandreplace_tree, run as
+    "Recursive Find and Replace.py tree FIND REPLACE [ROOT]".  Prints the count
+    for each changed file, then the totals and throughput, then any failures
+    to stderr.  Returns 1 if any file failed.
+    """
+
+    parser = argparse.ArgumentParser(prog="Recursive Find and Replace.py tree",
+                                     description="Find and replace across a directory tree.")
+    parser.add_argument("find")
+    parser.add_argument("replace")
+    parser.add_argument("root", nargs="?", default=os.curdir)
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only rewrite matching files (default: all)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="also skip matching files and directories "
+                             "(version control directories are always skipped)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    options = parser.parse_args(arguments)
+
+    changed, scanned, seconds, failed = findandreplace_tree(
+        options.find, options.replace, options.root, options.include or ("*",),
+        _VCS_DIRECTORIES + tuple(options.exclude), options.processes)
+    for path in sorted(changed):
+        print("%8d  %s" % (changed[path], path))
+    megabytes = scanned / float(1 << 20)
+    print("%d replacements in %d files; %.1f MB in %.2f s (%.1f MB/s)" % (
+        sum(changed.values()), len(changed), megabytes, seconds,
+        megabytes / seconds if seconds else 0.0))
+    for path in sorted(failed):
+        print("failed: %s: %s" % (path, failed[path]), file=sys.stderr)
+    return 1 if failed else 0
 
-        if (string[0:max(length,1)]) == find:
-            return findandreplace(find, replace, string[max(length,1):], processed + replace)
 
-        else:
-            return findandreplace(find, replace, string[1:], processed + string[0])
+def benchmark(sizes=(1 << 20, 1 << 24, 1 << 28, 1 << 30), find="needle", replace="pin"):
+    """
+    Times findandreplace against str.replace on text of each size in bytes,
+    with a match roughly every kilobyte.
+    Returns a list of (size, findandreplace seconds, str.replace seconds).
+    """
+
+    block = ("x" * 1018 + find)
+    results = []
+    for size in sizes:
+        string = block * (size // len(block)) + "x" * (size % len(block))
+        start = time.perf_counter()
+        ours = findandreplace(find, replace, string)
+        middle = time.perf_counter()
+        theirs = string.replace(find, replace)
+        end = time.perf_counter()
+        if ours != theirs:
+            raise AssertionError("findandreplace disagrees with str.replace.")
+        results.append((size, middle - start, end - middle))
+        del string, ours, theirs
+    return results
 
 
 class TestFindAndReplace(unittest.TestCase):
@@ -60,4 +449,234 @@ class TestFindAndReplace(unittest.TestCase):
 
     def test_gettysburg(self):
         self.assertEqual(findandreplace("Four score", "Eighty",
-            "Four score and seven years ago"), "Eighty and seven years ago")
\ No newline at end of file
+            "Four score and seven years ago"), "Eighty and seven years ago")
+    def test_overlapping(self):
+        self.assertEqual(findandreplace("aa", "b", "aaaaa"), "bba")
+
+    def test_find_longer_than_string(self):
+        self.assertEqual(findandreplace("abc", "x", "ab"), "ab")
+
+    def test_processed(self):
+        self.assertEqual(findandreplace("a", "b", "cab", "done: "), "done: cbb")
+        self.assertEqual(findandreplace("a", "b", "", "done"), "done")
+        self.assertEqual(findandreplace("", "b", "cab", "done: "), "done: cab")
+
+    def test_long_string(self):
+        string = "ab" * 100000
+        self.assertEqual(findandreplace("b", "cd", string), string.replace("b", "cd"))
+
+    def test_benchmark(self):
+        results = benchmark(sizes=(0, 5000))
+        self.assertEqual([size for size, _, _ in results], [0, 5000])
+
+
+class TestFindAndReplaceMany(unittest.TestCase):
+
+    def reference(self, mapping, string):
+        """ Leftmost-longest replacement through the re module. """
+        finds = sorted((find for find in mapping if find), key=len, reverse=True)
+        if not finds:
+            return string
+        pattern = re.compile("|".join(re.escape(find) for find in finds))
+        return pattern.sub(lambda match: mapping[match.group(0)], string)
+
+    def test_none_and_empty(self):
+        self.assertEqual(findandreplace_many(None, "aabb"), "aabb")
+        self.assertEqual(findandreplace_many({"a": "b"}, None), None)
+        self.assertEqual(findandreplace_many({}, "aabb", "x"), "xaabb")
+        self.assertEqual(findandreplace_many({"": "a", None: "b", "a": None}, "aabb"), "aabb")
+        self.assertEqual(findandreplace_many({"a": "b"}, ""), "")
+
+    def test_single_rule_matches_findandreplace(self):
+        for find, replace, string in (("a", "b", "aabb"), (" ", "", " a abb"), ("aa", "b", "aaaaa"),
+                                      ("Four score", "Eighty", "Four score and seven years ago")):
+            self.assertEqual(findandreplace_many({find: replace}, string, "> "),
+                             findandreplace(find, replace, string, "> "))
+
+    def test_one_pass(self):
+        self.assertEqual(findandreplace_many({"a": "b", "b": "a"}, "abba"), "baab")
+        self.assertEqual(findandreplace_many([("cat", "dog"), ("dog", "cat")], "cat dog"), "dog cat")
+
+    def test_leftmost_longest(self):
+        mapping = {"abcd": "1", "bc": "2", "ab": "3", "abcdef": "4", "cde": "5"}
+        self.assertEqual(findandreplace_many(mapping, "abcdeabcdefbcab"), "1e423")
+        self.assertEqual(findandreplace_many({"he": "1", "she": "2", "hers": "3"}, "ushers"), "u2rs")
+
+    def test_against_reference(self):
+        import random
+        generator = random.Random(2022)
+        for _ in range(200):
+            mapping = dict(("".join(generator.choice("abc") for _ in range(generator.randint(1, 4))),
+                            str(generator.randint(0, 9))) for _ in range(generator.randint(1, 6)))
+            string = "".join(generator.choice("abcd") for _ in range(generator.randint(0, 60)))
+            self.assertEqual(findandreplace_many(mapping, string), self.reference(mapping, string))
+
+    def test_special_characters(self):
+        self.assertEqual(findandreplace_many({"]": "[", "^-\\": "x", "é": "e"}, "a]^-\\é"), "a[xe")
+
+    def test_compiled_once(self):
+        first = compile_replacer({"a": "b", "c": "d"})
+        self.assertIs(compile_replacer([("c", "d"), ("a", "b")]), first)
+        self.assertEqual(findandreplace_many(first, "cab"), "dbb")
+        self.assertEqual(first.replace("abc"), "bbd")
+
+    def test_repeated_find(self):
+        rules = [("a", "X0"), ("a", "X1"), ("a", "X2")]
+        self.assertEqual(findandreplace_many(rules, "bab"), "bX2b")
+        self.assertEqual(findandreplace_many(rules[:2], "bab"), "bX1b")
+        self.assertEqual(findandreplace_many([("a", "X0"), ("a", None)], "bab"), "bX0b")
+
+
+class TestFindAndReplaceStream(unittest.TestCase):
+
+    def stream(self, find, replace, source, chunk_size):
+        sink = io.BytesIO() if isinstance(source, (bytes, io.BytesIO)) else io.StringIO()
+        count = findandreplace_stream(find, replace, source, sink, chunk_size)
+        return sink.getvalue(), count
+
+    def test_boundaries(self):
+        data = b"xxneedlexneedleneedlexxnee"
+        expected = data.replace(b"needle", b"pin")
+        for chunk_size in range(1, len(data) + 2):
+            self.assertEqual(self.stream(b"needle", b"pin", io.BytesIO(data), chunk_size), (expected, 3))
+            self.assertEqual(self.stream("needle", "pin", data, chunk_size), (expected, 3))
+
+    def test_against_replace(self):
+        import random
+        generator = random.Random(2023)
+        for _ in range(300):
+            find = "".join(generator.choice("ab") for _ in range(generator.randint(1, 4)))
+            replace = "".join(generator.choice("abc") for _ in range(generator.randint(0, 3)))
+            string = "".join(generator.choice("ab") for _ in range(generator.randint(0, 40)))
+            result = self.stream(find, replace, io.StringIO(string), generator.randint(1, 8))
+            self.assertEqual(result, (string.replace(find, replace), string.count(find)))
+
+    def test_none_and_empty(self):
+        self.assertEqual(self.stream(None, "a", b"aabb", 2), (b"aabb", 0))
+        self.assertEqual(self.stream("", "a", b"aabb", 2), (b"aabb", 0))
+        self.assertEqual(self.stream("a", None, b"aabb", 2), (b"aabb", 0))
+        self.assertEqual(self.stream("a", "b", b"", 2), (b"", 0))
+        self.assertRaises(ValueError, lambda: self.stream("a", "b", b"a", 0))
+
+    def test_files_and_mmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "log.txt")
+            with open(path, "wb") as handle:
+                handle.write("été error\n".encode("utf-8") * 1000)
+            with open(path, "rb") as handle:
+                sink = io.BytesIO()
+                self.assertEqual(findandreplace_stream("é", "e", handle, sink, 7), 2000)
+                self.assertEqual(sink.getvalue(), b"ete error\n" * 1000)
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    sink = io.BytesIO()
+                    self.assertEqual(findandreplace_stream("error", "ok", mapped, sink, 64), 1000)
+                    self.assertEqual(sink.getvalue(), "été ok\n".encode("utf-8") * 1000)
+
+    def test_inplace(self):
+        data = bytearray(b"abcabcab")
+        self.assertEqual(findandreplace_inplace("abc", "xyz", data), 2)
+        self.assertEqual(data, bytearray(b"xyzxyzab"))
+        self.assertEqual(findandreplace_inplace("aa", "ba", bytearray(b"aaaa")), 2)
+        self.assertRaises(ValueError, lambda: findandreplace_inplace("a", "bc", bytearray(b"a")))
+        self.assertEqual(findandreplace_inplace(None, "a", data), 0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "log.txt")
+            with open(path, "wb") as handle:
+                handle.write(b"WARN ok\n" * 500)
+            with open(path, "r+b") as handle:
+                self.assertEqual(findandreplace_inplace(b"WARN", b"INFO", handle), 500)
+            with open(path, "rb") as handle:
+                self.assertEqual(handle.read(), b"INFO ok\n" * 500)
+            open(path, "wb").close()
+            with open(path, "r+b") as handle:
+                self.assertEqual(findandreplace_inplace("a", "b", handle), 0)
+
+
+class TestFindAndReplaceTree(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.files = {
+            "a.py": b"old = old + 1\n",
+            "b.txt": b"old\n",
+            "clean.py": b"new\n",
+            "empty.py": b"",
+            os.path.join("pkg", "c.py"): b"x = 'old'\n" * 1000,
+            os.path.join(".git", "d.py"): b"old\n",
+            os.path.join("build", "e.py"): b"old\n",
+            "binary.py": b"old\0old\n",
+        }
+        for name, data in self.files.items():
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "wb") as handle:
+                handle.write(data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), "rb") as handle:
+            return handle.read()
+
+    def test_tree(self):
+        for processes in (2, 1):
+            clean = os.path.join(self.root, "clean.py")
+            before = os.stat(clean).st_mtime_ns
+            changed, scanned, seconds, failed = findandreplace_tree(
+                "old", "new", self.root, include=("*.py", ), exclude=(".git", "build"),
+                processes=processes)
+            self.assertEqual(failed, {})
+            if processes == 2:                  # The second run finds nothing left to change
+                self.assertEqual(changed, {os.path.join(self.root, "a.py"): 2,
+                                           os.path.join(self.root, "pkg", "c.py"): 1000})
+                self.assertEqual(scanned, sum(len(self.files[name]) for name in
+                                              ("a.py", "clean.py", "empty.py", "binary.py",
+                                               os.path.join("pkg", "c.py"))))
+            else:
+                self.assertEqual(changed, {})
+            self.assertGreaterEqual(seconds, 0)
+            self.assertEqual(os.stat(clean).st_mtime_ns, before)
+            self.assertEqual(self.read("a.py"), b"new = new + 1\n")
+            self.assertEqual(self.read(os.path.join("pkg", "c.py")), b"x = 'new'\n" * 1000)
+            for name in ("b.txt", os.path.join(".git", "d.py"), os.path.join("build", "e.py")):
+                self.assertEqual(self.read(name), b"old\n")
+            self.assertEqual(self.read("binary.py"), b"old\0old\n")
+        self.assertEqual(sorted(name for name in os.listdir(self.root) if name.startswith(".find")), [])
+
+    def test_default_exclude(self):
+        changed = findandreplace_tree("old", "new", self.root, processes=1)[0]
+        self.assertNotIn(os.path.join(self.root, ".git", "d.py"), changed)
+        self.assertIn(os.path.join(self.root, "build", "e.py"), changed)
+        self.assertEqual(self.read(os.path.join(".git", "d.py")), b"old\n")
+
+    def test_failure(self):
+        missing = os.path.join(self.root, "missing.py")
+        path, count, size, error = _rewrite_file((missing, b"old", b"new", 1 << 20))
+        self.assertEqual((path, count, size), (missing, 0, 0))
+        self.assertIsInstance(error, OSError)
+
+    def test_none(self):
+        self.assertEqual(findandreplace_tree(None, "x", self.root)[:2], ({}, 0))
+        self.assertEqual(findandreplace_tree("", "x", self.root)[:2], ({}, 0))
+
+    def test_main(self):
+        output = io.StringIO()
+        stdout, sys.stdout = sys.stdout, output
+        try:
+            self.assertEqual(main(["old", "older", self.root, "--include", "*.txt", "--processes", "1"]), 0)
+        finally:
+            sys.stdout = stdout
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0].split(), ["1", os.path.join(self.root, "b.txt")])
+        self.assertTrue(lines[1].startswith("1 replacements in 1 files;"))
+        self.assertTrue(lines[1].endswith("MB/s)"))
+        self.assertEqual(self.read("b.txt"), b"older\n")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["tree"]:
+        sys.exit(main(sys.argv[2:]))
+    unittest.main()
@@ -1,57 +1,418 @@
 from __future__ import print_function
+from collections import OrderedDict
+import asyncio
+import gc
+import io
+import random
+import struct
+import threading
+import time
 import unittest
 
 class LinkedList(object):
     class Node(object):
+        __slots__ = ('value', 'next_node')              #   No per-node __dict__
+
         def __init__(self, value, next_node):
             self.value = value
             self.next_node = next_node
 
-    def __init__(self, initial=None):
+    class DoubleNode(Node):
+        '''
+        Node that also links back to its predecessor (doubly-linked mode)
+        '''
+        __slots__ = ('prev_node', )
+
+        def __init__(self, value, next_node, prev_node=None):
+            LinkedList.Node.__init__(self, value, next_node)
+            self.prev_node = prev_node
+
+    class Lane(object):
+        '''
+        One express level of a node in the positional index: its neighbours on that level
+        and the number of chain steps to the next one (0 for the last node on the level)
+        '''
+        __slots__ = ('next_node', 'prev_node', 'width')
+
+        def __init__(self):
+            self.next_node = self.prev_node = None
+            self.width = 0
+
+    class IndexedNode(DoubleNode):
+        '''
+        Doubly-linked node that may also sit on express levels of the positional index
+        '''
+        __slots__ = ('lanes', )                         #   Tuple of Lane, or None for chain-only nodes
+
+        def __init__(self, value, next_node, lanes):
+            LinkedList.DoubleNode.__init__(self, value, next_node)
+            self.lanes = lanes
+
+    class PositionIndex(object):
+        '''
+        Indexable skip list over the node chain.  Level 0 is the chain itself; a node with
+        lanes also sits on that many express levels above it.  The position of the first and
+        last node on each level is stored relative to `shift`, so a front push or pop moves
+        every position at once and stays constant time.
+        '''
+        __slots__ = ('first', 'last', 'first_at', 'last_at', 'shift')
+        PROMOTE = .25                                   #   Chance of a node rising one more level
+        MAX_LEVELS = 32
+
+        def __init__(self):
+            self.first, self.last = [], []              #   First and last node on each express level
+            self.first_at, self.last_at = [], []        #   Their positions, minus shift
+            self.shift = 0
+
+        def new_lanes(self):
+            height = 0
+            while height < self.MAX_LEVELS and random.random() < self.PROMOTE:
+                height += 1
+            return tuple(LinkedList.Lane() for _ in range(height)) if height else None
+
+        def __grow(self, height):
+            while len(self.first) < height:
+                self.first.append(None)
+                self.last.append(None)
+                self.first_at.append(0)
+                self.last_at.append(0)
+
+        def __trim(self):
+            while self.first and self.first[-1] is None:
+                for levels in (self.first, self.last, self.first_at, self.last_at):
+                    levels.pop()
+
+        def search(self, index):
+            '''
+            Returns, for each level, the last node before index on that level and its position.
+            None and -1 stand for the start of the level.
+            '''
+            path, at = [None] * len(self.first), [-1] * len(self.first)
+            node, position = None, -1
+            for level in reversed(range(len(self.first))):
+                if node is None and self.first[level] is not None \
+                        and self.first_at[level] + self.shift < index:
+                    node, position = self.first[level], self.first_at[level] + self.shift
+                if node is not None:
+                    lane = node.lanes[level]
+                    while lane.next_node is not None and position + lane.width < index:
+                        position += lane.width
+                        node = lane.next_node
+                        lane = node.lanes[level]
+                path[level], at[level] = node, position
+            return path, at
+
+        def position_of(self, node):
+            '''
+            Returns the position of a node by walking back to a node with lanes, then climbing.
+            '''
+            steps = 0
+            while not node.lanes:
+                if node.prev_node is None:
+                    return steps
+                node = node.prev_node
+                steps += 1
+            while True:
+                level = len(node.lanes) - 1             #   Step back along the node's highest level
+                previous = node.lanes[level].prev_node
+                if previous is None:
+                    return steps + self.first_at[level] + self.shift
+                steps += previous.lanes[level].width
+                node = previous
+
+        def pushed_front(self, node):
+            self.shift += 1                             #   Every existing node moves back one position
+            lanes = node.lanes or ()
+            self.__grow(len(lanes))
+            for level, lane in enumerate(lanes):
+                following = self.first[level]
+                lane.next_node = following
+                if following is None:
+                    self.last[level], self.last_at[level] = node, -self.shift
+                else:
+                    lane.width = self.first_at[level] + self.shift
+                    following.lanes[level].prev_node = node
+                self.first[level], self.first_at[level] = node, -self.shift
+
+        def pushed_back(self, node, position):
+            lanes = node.lanes or ()
+            self.__grow(len(lanes))
+            for level, lane in enumerate(lanes):
+                previous = self.last[level]
+                lane.prev_node, lane.next_node, lane.width = previous, None, 0
+                if previous is None:
+                    self.first[level], self.first_at[level] = node, position - self.shift
+                else:
+                    previous.lanes[level].next_node = node
+                    previous.lanes[level].width = position - self.last_at[level] - self.shift
+                self.last[level], self.last_at[level] = node, position - self.shift
+
+        def popped_front(self, node):
+            self.shift -= 1                             #   Every remaining node moves up one position
+            for level, lane in enumerate(node.lanes or ()):
+                following = lane.next_node
+                self.first[level] = following
+                if following is None:
+                    self.last[level] = None
+                else:
+                    following.lanes[level].prev_node = None
+                    self.first_at[level] = lane.width - 1 - self.shift
+            self.__trim()
+
+        def popped_back(self, node):
+            for level, lane in enumerate(node.lanes or ()):
+                previous = lane.prev_node
+                self.last[level] = previous
+                if previous is None:
+                    self.first[level] = None
+                else:
+                    self.last_at[level] -= previous.lanes[level].width
+                    previous.lanes[level].next_node = None
+                    previous.lanes[level].width = 0
+            self.__trim()
+
+        def rebuild(self, front):
+            '''
+            Relinks every level from scratch after the chain was reordered.  Nodes keep their lanes.
+            '''
+            self.first, self.last, self.first_at, self.last_at = [], [], [], []
+            self.shift = 0
+            position, node = 0, front
+            while node:
+                self.pushed_back(node, position)
+                position, node = position + 1, node.next_node
+
+        def append(self, other, offset):
+            '''
+            Links another index's levels after this one's, its positions moved back by offset,
+            and leaves the other index empty.
+            '''
+            self.__grow(len(other.first))
+            for level in range(len(other.first)):
+                first_at = other.first_at[level] + other.shift + offset
+                last_at = other.last_at[level] + other.shift + offset
+                previous = self.last[level]
+                if previous is None:
+                    self.first[level], self.first_at[level] = other.first[level], first_at - self.shift
+                else:
+                    previous.lanes[level].next_node = other.first[level]
+                    previous.lanes[level].width = first_at - self.last_at[level] - self.shift
+                    other.first[level].lanes[level].prev_node = previous
+                self.last[level], self.last_at[level] = other.last[level], last_at - self.shift
+            other.rebuild(None)
+
+        def inserted(self, path, at, node, position):
+            '''
+            Links a node just placed in the chain at position, given search(position) from before.
+            '''
+            lanes = node.lanes or ()
+            self.__grow(len(lanes))
+            for level in range(len(self.first)):
+                previous = path[level] if level < len(path) else None
+                if previous is None:
+                    following = self.first[level]
+                    following_at = self.first_at[level] + self.shift
+                else:
+                    following = previous.lanes[level].next_node
+                    following_at = at[level] + previous.lanes[level].width
+                if following is not None:               #   The last node on the level is at or past position
+                    self.last_at[level] += 1
+                if level < len(lanes):
+                    lane = lanes[level]
+                    lane.prev_node, lane.next_node = previous, following
+                    if following is None:
+                        self.last[level], self.last_at[level] = node, position - self.shift
+                    else:
+                        lane.width = following_at + 1 - position
+                        following.lanes[level].prev_node = node
+                    if previous is None:
+                        self.first[level], self.first_at[level] = node, position - self.shift
+                    else:
+                        previous.lanes[level].next_node = node
+                        previous.lanes[level].width = position - at[level]
+                elif previous is None:
+                    if following is not None:
+                        self.first_at[level] += 1
+                elif following is not None:
+                    previous.lanes[level].width += 1
+
+        def deleted(self, path, at, node, position):
+            '''
+            Unlinks a node that was at position, given search(position) from before.
+            '''
+            for level in range(len(self.first)):
+                previous = path[level]
+                following = self.first[level] if previous is None else previous.lanes[level].next_node
+                if following is node:
+                    lane = node.lanes[level]
+                    after = lane.next_node
+                    if previous is None:
+                        self.first[level] = after
+                        self.first_at[level] = position + lane.width - 1 - self.shift
+                    else:
+                        previous.lanes[level].next_node = after
+                        if after is None:
+                            previous.lanes[level].width = 0
+                        else:
+                            previous.lanes[level].width += lane.width - 1
+                    if after is None:
+                        self.last[level], self.last_at[level] = previous, at[level] - self.shift
+                    else:
+                        after.lanes[level].prev_node = previous
+                        self.last_at[level] -= 1
+                elif following is not None:
+                    self.last_at[level] -= 1
+                    if previous is None:
+                        self.first_at[level] -= 1
+                    else:
+                        previous.lanes[level].width -= 1
+            self.__trim()
+
+    class Iterator(object):
+        '''
+        Cursor over a LinkedList.  Each __iter__ call gets its own, so traversals can nest.
+        The list counts its unfinished cursors and recycles no nodes while any exist.
+        '''
+        __slots__ = ('current', 'owner')
+
+        def __init__(self, owner):
+            self.current = owner.front
+            self.owner = owner
+            owner.iterators += 1
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            if self.current:
+                tmp = self.current.value
+                self.current = self.current.next_node
+                return tmp
+            else:
+                self.close()
+                raise StopIteration()
+
+        def close(self):
+            if self.owner is not None:
+                self.owner.iterators -= 1
+                self.owner = None
+
+        def __del__(self):
+            self.close()
+
+    def __init__(self, initial=None, doubly_linked=False, value_index=False, positional_index=False,
+                 stringify=True, pool_size=0):
         '''
         LinkedList constructor
-            initial:    Optional parameter.  If included, converts to tuple (if necessary)
-                        and adds data to the list in the original order.
+            initial:            Optional parameter.  If included, converts to tuple (if necessary)
+                                and adds data to the list in the original order.
+            stringify:          Optional parameter.  If False, initial data is stored as-is instead of
+                                as str(), and remove() compares values as-is too.
+            pool_size:          Optional parameter.  Most popped nodes kept for reuse by later pushes.
+                                Nodes popped while an iterator is unfinished are not kept, so
+                                no iterator can reach a reused node.
+            doubly_linked:      Optional parameter.  If True, nodes also link to their predecessor,
+                                so push and pop are constant time at both ends.
+            value_index:        Optional parameter.  If True, keeps a map from each value to its nodes,
+                                so `in` is constant time and remove() only visits matching nodes.
+                                Implies doubly_linked, since matches are unlinked without a walk.
+            positional_index:   Optional parameter.  If True, keeps a skip list over the nodes, so
+                                indexing, insert() and del take O(log n) expected time while push
+                                and pop stay constant time.  Implies doubly_linked.
         '''
-        self.front = self.back = self.current = None    #   Initialize front, back, and current pointers
+        self.doubly_linked = doubly_linked or value_index or positional_index
+        self.front = self.back = None                   #   Initialize front and back pointers
+        self.size = 0                                   #   Number of nodes, kept current by every change
+        self.middle = None                              #   Node at index (size-1)//2, or None to recompute
+        self.index = {} if value_index else None        #   value -> {node: None} for every hashable value
+        self.positions = self.PositionIndex() if positional_index else None
+        self.stringify = stringify
+        self.pool_size = pool_size
+        self.spare = []                                 #   Popped nodes waiting for reuse
+        self.iterators = 0                              #   Unfinished Iterator objects over this list
         if initial != None:                             #   If data has been passed:
             if type(initial) != tuple:
                 initial = (initial, )                   #       Convert to tuple if necessary
-            for each in initial:
-                self.push("back", str(each))            #       Add each item to the list
+            if stringify:
+                initial = (str(each) for each in initial)
+            self.extend(initial)                        #   Add all items to the list in one splice
 
     def empty(self):
         return self.front == self.back == None
 
+    def __len__(self):
+        return self.size
+
     def __iter__(self):
-        self.current = self.front
-        return self
-
-    def __next__(self):
-        if self.current:
-            tmp = self.current.value
-            self.current = self.current.next_node
-            return tmp
-        else:
-            raise StopIteration()
+        return self.Iterator(self)
+
+    def __contains__(self, value):
+        if self.index is not None:
+            try:
+                return value in self.index
+            except TypeError:                           #   Unhashable values are never indexed
+                pass
+        return any(each == value for each in self)
 
     def __str__(self):
         '''
         Return LinkedList in a printable format
         '''
-        string = ""
-        for each in self:
-            string += str(each) + ", "
-        return string[:-2]                              #   Truncate the trailing comma and space
+        return ", ".join(str(each) for each in self)    #   Single pass, no repeated concatenation
 
     def __repr__(self):
         '''
         Return class name and contents in printable format
         '''
-        string = "LinkedList(("
-        string += str(self)
-        string += "))"
-        return string
+        return "LinkedList((" + str(self) + "))"
+
+    def write(self, stream, representation=False, batch=1024):
+        '''
+        Writes the str() form of the list (or the repr() form) to a text stream
+        in batches of values, without building the whole string in memory.
+        '''
+        _write_values(stream, self, "LinkedList((" if representation else "",
+                      "))" if representation else "", batch)
+
+    def save(self, stream):
+        '''
+        Writes the values to a binary stream: a header with the count, then each value
+        tagged with its type behind its length.  Output is buffered in blocks, so the list
+        is never copied.  Values must be str, bytes, int or float.
+        '''
+        stream.write(_CHECKPOINT.pack(_CHECKPOINT_MAGIC, 1, self.size))
+        block = bytearray()
+        for value in self:
+            data = _encode(value)
+            block += _LENGTH.pack(len(data))
+            block += data
+            if len(block) >= _CHECKPOINT_BLOCK:
+                stream.write(block)
+                block = bytearray()
+        stream.write(block)
+
+    @classmethod
+    def load(cls, stream, **options):
+        '''
+        Reads values written by save() into a new LinkedList built with the given constructor
+        options.  Values are decoded straight from the stream into one chain, spliced in once.
+        The cyclic garbage collector is paused meanwhile, since every node created is kept.
+        '''
+        header = stream.read(_CHECKPOINT.size)
+        if len(header) < _CHECKPOINT.size:
+            raise ValueError("Truncated LinkedList checkpoint.")
+        magic, version, count = _CHECKPOINT.unpack(header)
+        if magic != _CHECKPOINT_MAGIC or version != 1:
+            raise ValueError("Not a LinkedList checkpoint.")
+        result = cls(**options)
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            result.extend(_read_values(stream, count))
+        finally:
+            if collecting:
+                gc.enable()
+        return result
 
     def push(self, position, value):
         '''
@@ -65,14 +426,32 @@ class LinkedList(object):
             next = None                                 #       Set next pointer to None
         else:                                           #   Otherwise, raise error
             raise ValueError("Insertion point either not specified or invalid.")
-        new_node = self.Node(value, next)               #   New node with passed value and next pointer
+        middle_index = (self.size - 1) // 2             #   Middle node's index before the insertion
+        new_node = self.__new_node(value, next)         #   New node with passed value and next pointer
         if self.empty():                                #   For empty lists:
             self.front = self.back = new_node           #       Set front and back pointers to reference the new node
         elif position == "front":                       #   For non-empty lists (Front insertion):
+            if self.doubly_linked:
+                self.front.prev_node = new_node         #       Link the old front node back to the new node
             self.front = new_node                       #       Set front pointer to reference the new node
         else:                                           #   For non-empty lists (Back insertion):
+            if self.doubly_linked:
+                new_node.prev_node = self.back          #       Link the new node back to the old last node
             self.back.next_node = new_node              #       Create a 'next' pointer from the last node to the new node
             self.back = new_node                        #       Move the 'back' pointer to the new node
+        self.size += 1
+        if self.index is not None:
+            self.__index_add(new_node)
+        if self.positions is None:
+            pass
+        elif position == "front":
+            self.positions.pushed_front(new_node)
+        else:
+            self.positions.pushed_back(new_node, self.size - 1)
+        if self.size == 1:
+            self.middle = new_node
+        else:                                           #   A front insertion shifts the middle node back one index
+            self.__settle_middle(middle_index + (position == "front"))
 
     def pop(self, position):
         '''
@@ -81,58 +460,1009 @@ class LinkedList(object):
         '''
         if self.empty():                                #   Error on empty list
             raise RuntimeError("Cannot delete from empty list.")
-        pop_value = self.front.value                    #   Initialize first node as return value
+        pop_node = self.front                           #   Initialize first node as the removed node
+        middle_index = (self.size - 1) // 2             #   Middle node's index before the removal
         if self.front == self.back:                     #   For lists with 1 node:
             self.front = self.back = None               #       Remove node references to clear list
         elif position == 'front':                       #   For lists with 2+ nodes (front removal):
             self.front = self.front.next_node           #       Set front pointer to reference 2nd node
+            if self.doubly_linked:
+                self.front.prev_node = None             #       Break the new front node's back link
+        elif position == 'back' and self.doubly_linked: #   For lists with 2+ nodes (doubly-linked back removal):
+            pop_node = self.back                        #       Last node is the removed node
+            self.back = self.back.prev_node             #       Step the back pointer to the previous node
+            self.back.next_node = None                  #       Break end node's next link
         elif position == 'back':                        #   For lists with 2+ nodes (back removal):
             current_node = self.front                   #       Start at first node
             previous_node = current_node                #       Track previous node
             while current_node.next_node:               #       Loop to last node
                 previous_node = current_node            #           Increment previous node
                 current_node = current_node.next_node   #           Increment current node
-            pop_value = current_node.value              #       Set return value equal to last node's value
+            pop_node = current_node                     #       Last node is the removed node
             self.back = previous_node                   #       Previous node becomes new end node
             self.back.next_node = None                  #       Break end node's next link
         else:                                           #   Error if missing/incorrect position variable
             raise ValueError("Removal point either not specified or invalid.")
-        return pop_value
+        self.size -= 1
+        if self.index is not None:
+            self.__index_discard(pop_node)
+        if self.positions is None:
+            pass
+        elif position == "front":
+            self.positions.popped_front(pop_node)
+        else:
+            self.positions.popped_back(pop_node)
+        if self.size == 0:
+            self.middle = None
+        else:                                           #   A front removal shifts the middle node forward one index
+            self.__settle_middle(middle_index - (position == "front"))
+        value = pop_node.value
+        self.__recycle(pop_node)
+        return value
+
+    def __new_node(self, value, next_node):
+        '''
+        Returns a node of this list's kind, reusing a spare one when available
+        '''
+        if self.spare:
+            node = self.spare.pop()
+            node.value, node.next_node = value, next_node
+            if self.positions is not None:
+                node.lanes = self.positions.new_lanes()
+            return node
+        if self.positions is not None:
+            return self.IndexedNode(value, next_node, self.positions.new_lanes())
+        if self.doubly_linked:
+            return self.DoubleNode(value, next_node)
+        return self.Node(value, next_node)
+
+    def __recycle(self, node):
+        if len(self.spare) < self.pool_size and not self.iterators:
+            node.value = node.next_node = None          #   Drop references
+            if self.doubly_linked:
+                node.prev_node = None
+            if self.positions is not None:
+                node.lanes = None
+            self.spare.append(node)
+
+    def extend(self, values, position="back"):
+        '''
+        Inserts many values, stored as-is, by linking them into a chain and splicing it in once
+            values:     Any iterable.  The values keep their order at either end.
+            position:   Determines insertion point.  Requires "front" or "back"
+        '''
+        if position not in ("front", "back"):
+            raise ValueError("Insertion point either not specified or invalid.")
+        first = last = None
+        nodes = [] if self.positions is not None else None
+        count = 0
+        for value in values:                            #   Build the new chain on the side
+            node = self.__new_node(value, None)
+            if last is None:
+                first = node
+            else:
+                last.next_node = node
+                if self.doubly_linked:
+                    node.prev_node = last
+            last = node
+            count += 1
+            if self.index is not None:
+                self.__index_add(node)
+            if nodes is not None:
+                nodes.append(node)
+        if not count:
+            return
+        if self.empty():                                #   Splice the chain in
+            self.front, self.back = first, last
+        elif position == "front":
+            last.next_node = self.front
+            if self.doubly_linked:
+                self.front.prev_node = last
+            self.front = first
+        else:
+            self.back.next_node = first
+            if self.doubly_linked:
+                first.prev_node = self.back
+            self.back = last
+        if nodes is not None:
+            if position == "front":
+                for node in reversed(nodes):            #   Each lands at position 0 in turn
+                    self.positions.pushed_front(node)
+            else:
+                for offset, node in enumerate(nodes):
+                    self.positions.pushed_back(node, self.size + offset)
+        self.size += count
+        self.middle = None                              #   Found again by the next find_middle()
+
+    def drain(self, count=None, position="front"):
+        '''
+        Detaches up to count values (all of them by default) from one end in a single cut
+        and returns them as a list, in the order pop() would have returned them
+            position:   Determines which end is drained.  Requires "front" or "back"
+        '''
+        if position not in ("front", "back"):
+            raise ValueError("Removal point either not specified or invalid.")
+        if count is None or count > self.size:
+            count = self.size
+        if count <= 0:
+            return []
+        if position == "front":
+            nodes = []
+            node = self.front
+            for _ in range(count):
+                nodes.append(node)
+                node = node.next_node
+            self.front = node                           #   Cut after the last drained node
+            if node is None:
+                self.back = None
+            elif self.doubly_linked:
+                node.prev_node = None
+        else:
+            if self.doubly_linked:
+                nodes = []
+                node = self.back
+                for _ in range(count):
+                    nodes.append(node)
+                    node = node.prev_node
+            else:                                       #   Walk to the new last node, then collect the tail
+                node = None if count == self.size else self.__locate(self.size - count - 1)[0]
+                nodes = []
+                current = self.front if node is None else node.next_node
+                while current:
+                    nodes.append(current)
+                    current = current.next_node
+                nodes.reverse()
+            self.back = node                            #   Cut before the last drained node
+            if node is None:
+                self.front = None
+            else:
+                node.next_node = None
+        self.size -= count
+        self.middle = None                              #   Found again by the next find_middle()
+        values = []
+        for node in nodes:
+            values.append(node.value)
+            if self.index is not None:
+                self.__index_discard(node)
+            if self.positions is None:
+                pass
+            elif position == "front":                   #   Each drained node is at that end in turn
+                self.positions.popped_front(node)
+            else:
+                self.positions.popped_back(node)
+            self.__recycle(node)
+        return values
+
+    def sort(self, key=None, reverse=False):
+        '''
+        Sorts the list in place with a bottom-up merge sort that relinks the existing nodes.
+        Stable, with the same key and reverse arguments as list.sort().
+        '''
+        rank = self.__ranking((self, ), key)
+        front, run = self.front, 1
+        while run < self.size:                          #   Merge neighbouring sorted runs of length run
+            current, front, tail = front, None, None
+            while current:
+                left = current
+                right = self.__cut(left, run)
+                current = self.__cut(right, run)
+                head, last = self.__merged(left, right, rank, reverse)
+                if tail is None:
+                    front = head
+                else:
+                    tail.next_node = head
+                tail = last
+            run *= 2
+        self.__relink(front)
+
+    def merge(self, other, key=None, reverse=False):
+        '''
+        Merges another sorted LinkedList into this sorted one by relinking its nodes, leaving
+        it empty.  Both lists must be sorted with the given key and reverse arguments.
+        '''
+        self.__check_compatible(other)
+        if other is self or other.empty():
+            return
+        rank = self.__ranking((self, other), key)
+        front = self.__merged(self.front, other.front, rank, reverse)[0]
+        self.__adopt(other)
+        self.__relink(front)
+
+    def splice(self, other):
+        '''
+        Moves all of another LinkedList's nodes onto the back of this one, leaving it empty.
+        Constant time, plus one step per moved node with a value index and one per level
+        with a positional index.
+        '''
+        self.__check_compatible(other)
+        if other is self or other.empty():
+            return
+        if self.positions is not None:
+            self.positions.append(other.positions, self.size)
+        if self.empty():
+            self.front = other.front
+        else:
+            self.back.next_node = other.front
+            if self.doubly_linked:
+                other.front.prev_node = self.back
+        self.back = other.back
+        self.__adopt(other)
+        self.middle = None                              #   Found again by the next find_middle()
+
+    def __check_compatible(self, other):
+        if self.doubly_linked != other.doubly_linked or \
+                (self.positions is None) != (other.positions is None):
+            raise ValueError("Both lists must use the same kind of node.")
+
+    def __adopt(self, other):
+        '''
+        Takes over the size and value index entries of another list's nodes, and empties it
+        '''
+        self.size += other.size
+        if self.index is not None:
+            node = other.front
+            while node:
+                self.__index_add(node)
+                node = node.next_node
+        if other.index is not None:
+            other.index.clear()
+        other.front = other.back = other.middle = None
+        other.size = 0
+
+    @staticmethod
+    def __ranking(linked_lists, key):
+        '''
+        Returns a function from node to sort key, or None to compare values directly.
+        Keys are computed once per node.
+        '''
+        if key is None:
+            return None
+        keys = {}
+        for linked_list in linked_lists:
+            node = linked_list.front
+            while node:
+                keys[node] = key(node.value)
+                node = node.next_node
+        return keys.__getitem__
+
+    @staticmethod
+    def __cut(node, count):
+        '''
+        Detaches the chain after count nodes starting at node, and returns the rest
+        '''
+        for _ in range(count - 1):
+            if node is None:
+                return None
+            node = node.next_node
+        if node is None:
+            return None
+        rest, node.next_node = node.next_node, None
+        return rest
+
+    @staticmethod
+    def __merged(left, right, rank, reverse):
+        '''
+        Merges two sorted chains, keeping left before right on ties.
+        Returns the first and last node of the result.
+        '''
+        head = tail = None
+        if left is not None and right is not None:
+            if rank is None:                            #   Compare values directly, without a call per node
+                while left and right:
+                    if (left.value < right.value) if reverse else (right.value < left.value):
+                        node, right = right, right.next_node
+                    else:
+                        node, left = left, left.next_node
+                    if tail is None:
+                        head = node
+                    else:
+                        tail.next_node = node
+                    tail = node
+            else:
+                while left and right:
+                    left_rank, right_rank = rank(left), rank(right)
+                    if (left_rank < right_rank) if reverse else (right_rank < left_rank):
+                        node, right = right, right.next_node
+                    else:
+                        node, left = left, left.next_node
+                    if tail is None:
+                        head = node
+                    else:
+                        tail.next_node = node
+                    tail = node
+        rest = left or right
+        if tail is None:
+            head = tail = rest
+        else:
+            tail.next_node = rest
+        while tail and tail.next_node:
+            tail = tail.next_node
+        return head, tail
+
+    def __relink(self, front):
+        '''
+        Installs a reordered chain: finds the back node and rebuilds the back links and
+        positional index
+        '''
+        self.front = front
+        previous, node = None, front
+        while node:
+            if self.doubly_linked:
+                node.prev_node = previous
+            previous, node = node, node.next_node
+        self.back = previous
+        self.middle = None                              #   Found again by the next find_middle()
+        if self.positions is not None:
+            self.positions.rebuild(front)
+
+    def __settle_middle(self, index):
+        '''
+        Moves the middle pointer from the given index to index (size-1)//2.
+        Push and pop change that index by at most one.  A backward step without
+        prev_node links drops the pointer for find_middle() to recompute.
+        '''
+        if self.middle is None:
+            return
+        target = (self.size - 1) // 2
+        if index < target:
+            self.middle = self.middle.next_node
+        elif index > target:
+            self.middle = self.middle.prev_node if self.doubly_linked else None
+
+    def __locate(self, index):
+        '''
+        Returns the node at an in-range index, and the positional index's search path to it
+        (None without a positional index)
+        '''
+        if self.positions is not None:
+            path = self.positions.search(index)
+            node, position = self.front, 0
+            if path[0] and path[0][0] is not None:      #   Drop from the lowest express level to the chain
+                node, position = path[0][0], path[1][0]
+            while position < index:
+                node = node.next_node
+                position += 1
+            return node, path
+        if self.doubly_linked and index > self.size // 2:
+            node = self.back                            #   Walk from the nearer end
+            for _ in range(self.size - 1 - index):
+                node = node.prev_node
+        else:
+            node = self.front
+            for _ in range(index):
+                node = node.next_node
+        return node, None
+
+    def __position(self, index):
+        if not isinstance(index, int):
+            raise TypeError("LinkedList indices must be integers or slices.")
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("LinkedList index out of range.")
+        return index
+
+    def __getitem__(self, index):
+        '''
+        Returns the value at an index, or a new LinkedList for a slice
+        '''
+        if isinstance(index, slice):
+            positions = range(*index.indices(self.size))
+            result = LinkedList(doubly_linked=self.doubly_linked, value_index=self.index is not None,
+                                positional_index=self.positions is not None, stringify=self.stringify)
+            if not positions:
+                return result
+            values = []
+            node = self.__locate(min(positions[0], positions[-1]))[0]
+            while True:                                 #   Walk forward, keeping every |step|-th value
+                values.append(node.value)
+                if len(values) == len(positions):
+                    break
+                for _ in range(abs(positions.step)):
+                    node = node.next_node
+            if positions.step < 0:
+                values.reverse()
+            result.extend(values)
+            return result
+        return self.__locate(self.__position(index))[0].value
+
+    def __delitem__(self, index):
+        '''
+        Removes the value at an index, or every value in a slice
+        '''
+        if isinstance(index, slice):
+            for position in sorted(range(*index.indices(self.size)), reverse=True):
+                del self[position]
+            return
+        index = self.__position(index)
+        if index == 0:
+            self.pop("front")
+        elif index == self.size - 1:
+            self.pop("back")
+        else:
+            node, path = self.__locate(index)
+            previous = node.prev_node if self.doubly_linked else self.__locate(index - 1)[0]
+            if self.index is not None:
+                self.__index_discard(node)
+            self.__unlink(previous, node, index, path)
+
+    def insert(self, index, value):
+        '''
+        Inserts a value before the given index, like list.insert()
+            index:      Position of the new value.  Negative indices count from the back;
+                        out-of-range indices insert at the nearer end.
+            value:      The value entered into the list.
+        '''
+        if index < 0:
+            index = max(index + self.size, 0)
+        if index == 0:
+            return self.push("front", value)
+        if index >= self.size:
+            return self.push("back", value)
+        following, path = self.__locate(index)
+        if self.doubly_linked:
+            previous = following.prev_node
+        else:
+            previous = self.__locate(index - 1)[0]
+        new_node = self.__new_node(value, following)
+        previous.next_node = new_node                   #   Link the new node between its neighbours
+        if self.doubly_linked:
+            new_node.prev_node = previous
+            following.prev_node = new_node
+        self.size += 1
+        self.middle = None                              #   Found again by the next find_middle()
+        if self.index is not None:
+            self.__index_add(new_node)
+        if self.positions is not None:
+            self.positions.inserted(path[0], path[1], new_node, index)
 
     def remove(self, value):
         '''
         Removes all instances of a given value from a list
         '''
+        self.remove_all((value, ))
+
+    def remove_all(self, values):
+        '''
+        Removes all instances of each of the given values from a list in a single pass
+        (or, with a value index, by visiting only the matching nodes).  Unhashable values
+        are compared with == against every node.
+        '''
+        targets, others = set(), []                     #   Hashable targets, and the rest
+        for each in values:
+            each = str(each) if self.stringify else each
+            try:
+                targets.add(each)
+            except TypeError:
+                others.append(each)
+        if self.index is not None:
+            for target in targets:
+                for node in self.index.pop(target, ()):
+                    self.__unlink(node.prev_node, node)
+            if not others:
+                return
+            targets = ()                                #   Unhashable values are never indexed: scan for the rest
+        previous = None                                 #   Track previous kept node
+        middle = None                                   #   Kept node at index (kept-1)//2
         current = self.front                            #   Start at first node
-        previous = current                              #   Track previous node
-        for each in self:                               #   Check each node's value against target
-            if current.value == str(value):             #   If values match:
-                if current == self.front and current == self.back:
-                    self.front = self.back = None       #       If front AND back node, clear list and end
-                    return
-                if current == self.front:               #       If front node:
-                    self.front = current.next = current #           Move front pointer to next node
-                if current == self.back:                #       If back node:
-                    self.back = previous                #           Move back pointer to previous node
-                previous.next_node = current.next_node  #       Link previous to next
-                current = current.next_node             #       Increment current node
-            else:                                       #   Increment previous and current
+        position = 0                                    #   Position of the current node
+        while current:                                  #   Check each node's value against the targets
+            following = current.next_node
+            if self.__matches(current.value, targets, others):  #   If values match, unlink the node
+                self.__unlink(previous, current, position)
+            else:                                       #   Otherwise keep it and track it as previous
                 previous = current
-                current = current.next_node
+                position += 1
+                if position == 1:                       #   The middle advances on every second kept node
+                    middle = current
+                elif position % 2 == 1:
+                    middle = middle.next_node
+            current = following
+        self.middle = middle
+
+    def __unlink(self, previous, node, position=None, path=None):
+        '''
+        Unlinks a node from the chain (and the positional index, finding its position and
+        search path there when they are not given)
+        '''
+        if self.positions is not None:
+            if position is None:
+                position = self.positions.position_of(node)
+            if path is None:
+                path = self.positions.search(position)
+            self.positions.deleted(path[0], path[1], node, position)
+        following = node.next_node
+        if previous:                                    #   Link previous to next
+            previous.next_node = following
+        else:                                           #   Or move the front pointer past it
+            self.front = following
+        if following and self.doubly_linked:
+            following.prev_node = previous              #   Link next back to previous
+        if node is self.back:                           #   If back node:
+            self.back = previous                        #       Move back pointer to previous node
+        self.size -= 1
+        self.middle = None                              #   Found again by the next find_middle()
+
+    @staticmethod
+    def __matches(value, targets, others):
+        try:
+            if value in targets:
+                return True
+        except TypeError:                               #   Unhashable values never equal a hashable target
+            pass
+        return bool(others) and any(value == other for other in others)
+
+    def __index_add(self, node):
+        try:
+            self.index.setdefault(node.value, {})[node] = None
+        except TypeError:                               #   Unhashable values stay out of the index
+            pass
+
+    def __index_discard(self, node):
+        try:
+            nodes = self.index[node.value]
+        except (KeyError, TypeError):
+            return
+        nodes.pop(node, None)
+        if not nodes:
+            del self.index[node.value]
 
     def find_middle(self):
         '''
         Returns the value of the middle node in a linked list.
         For lists with an even number of elements, returns both middle values.
+        Constant time from the maintained middle pointer.  After remove() with a value index,
+        deleting an inner index, or a front push or back pop on a singly-linked list, one
+        walk to the middle finds it again.
         '''
-        elements = ()                                   #   Initialize tuple
-        for each in self:
-            elements += (str(each), )                   #   Add each element to list
-        mid = int(len(elements)/2)                      #   Middle node location
-        if len(elements)%2 == 1:                        #   For odd-numbered lists:
-            return elements[mid]                        #       Return middle value
-        else:                                           #   For even-numbered lists:
-            return elements[mid-1:mid+1]                #       return both middle values as tuple
+        if self.empty():
+            return ()
+        if self.middle is None:
+            self.middle = self.__locate((self.size - 1) // 2)[0]
+        if self.size%2 == 1:                            #   For odd-numbered lists:
+            return str(self.middle.value)               #       Return middle value
+        else:                                           #   For even-numbered lists (return both middle values):
+            return (str(self.middle.value), str(self.middle.next_node.value))
+
+_CHECKPOINT = struct.Struct("<8sIQ")                    #   magic, version, value count
+_CHECKPOINT_MAGIC = b"CS2050LL"
+_CHECKPOINT_BLOCK = 1 << 20                             #   Bytes buffered per read or write while streaming
+_LENGTH = struct.Struct("<I")
+
+def _encode(value):
+    '''
+    Encodes a str, bytes, int or float as a one-byte type tag followed by its payload
+    '''
+    kind = type(value)
+    if kind is str:
+        return b"s" + value.encode("utf-8")
+    if kind is bytes:
+        return b"b" + value
+    if kind is int:
+        return b"i" + value.to_bytes(value.bit_length() // 8 + 1, "big", signed=True)
+    if kind is float:
+        return b"f" + struct.pack(">d", value)
+    raise TypeError("Saved values must be str, bytes, int or float.")
+
+def _decode(data):
+    tag, payload = data[:1], data[1:]
+    if tag == b"s":
+        return payload.decode("utf-8")
+    if tag == b"b":
+        return payload
+    if tag == b"i":
+        return int.from_bytes(payload, "big", signed=True)
+    if tag == b"f":
+        return struct.unpack(">d", payload)[0]
+    raise ValueError("Unknown type tag in LinkedList checkpoint.")
+
+def _read_values(stream, count):
+    '''
+    Yields count decoded values from a stream, reading a block at a time.
+    Raises ValueError if the stream ends early.
+    '''
+    block, start = b"", 0
+
+    def fill(size):
+        ''' Makes sure size unread bytes are buffered and returns the buffer '''
+        nonlocal block, start
+        if len(block) - start < size:               #   Refill, keeping the unread tail
+            block = block[start:] + stream.read(max(size, _CHECKPOINT_BLOCK))
+            start = 0
+            if len(block) < size:
+                raise ValueError("Truncated LinkedList checkpoint.")
+        return block
+
+    unpack = _LENGTH.unpack_from
+    for _ in range(count):
+        if len(block) - start < _LENGTH.size:
+            fill(_LENGTH.size)
+        size = unpack(block, start)[0]
+        start += _LENGTH.size
+        if len(block) - start < size:
+            fill(size)
+        start += size
+        yield _decode(block[start - size:start])
+
+def _write_values(stream, values, prefix, suffix, batch):
+    '''
+    Writes prefix, the values separated by ", ", then suffix to a text stream,
+    joining at most batch values at a time.
+    '''
+    stream.write(prefix)
+    pending = []
+    separator = ""
+    for each in values:
+        pending.append(str(each))
+        if len(pending) == batch:
+            stream.write(separator + ", ".join(pending))
+            separator = ", "
+            pending = []
+    if pending:
+        stream.write(separator + ", ".join(pending))
+    stream.write(suffix)
+
+class UnrolledLinkedList(object):
+    '''
+    Linked list whose nodes each hold up to chunk_size values in an array.
+    Same push, pop, remove, iteration and find_middle behavior as LinkedList, with far
+    fewer node objects and contiguous values for better locality while iterating.
+    '''
+    class Chunk(object):
+        __slots__ = ('values', 'next_node', 'prev_node')
+
+        def __init__(self, values, next_node, prev_node):
+            self.values = values
+            self.next_node = next_node
+            self.prev_node = prev_node
+
+    def __init__(self, initial=None, chunk_size=64):
+        '''
+        UnrolledLinkedList constructor
+            initial:    Optional parameter.  If included, converts to tuple (if necessary)
+                        and adds data to the list in the original order.
+            chunk_size: Optional parameter.  Maximum number of values held by one node.
+        '''
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1.")
+        self.chunk_size = chunk_size
+        self.front = self.back = None                   #   Initialize front and back chunk pointers
+        self.size = 0
+        if initial != None:
+            if type(initial) != tuple:
+                initial = (initial, )
+            for each in initial:
+                self.push("back", str(each))
+
+    def empty(self):
+        return self.size == 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        chunk = self.front
+        while chunk:
+            for value in chunk.values:
+                yield value
+            chunk = chunk.next_node
+
+    def __str__(self):
+        return ", ".join(str(each) for each in self)
+
+    def __repr__(self):
+        return "UnrolledLinkedList((" + str(self) + "))"
+
+    def write(self, stream, representation=False, batch=1024):
+        '''
+        Writes the str() or repr() form to a text stream without building the whole string.
+        '''
+        _write_values(stream, self, "UnrolledLinkedList((" if representation else "",
+                      "))" if representation else "", batch)
+
+    def push(self, position, value):
+        '''
+        Inserts a value into an UnrolledLinkedList
+            position:   Determines insertion point.  Requires "front" or "back"
+            value:      The value entered into the list.
+        A full end chunk gets a new neighbour rather than being split.
+        '''
+        if position == "front":
+            if self.front is None or len(self.front.values) == self.chunk_size:
+                chunk = self.Chunk([], self.front, None)
+                if self.front:
+                    self.front.prev_node = chunk
+                else:
+                    self.back = chunk
+                self.front = chunk
+            self.front.values.insert(0, value)          #   Bounded by chunk_size, so constant time
+        elif position == "back":
+            if self.back is None or len(self.back.values) == self.chunk_size:
+                chunk = self.Chunk([], None, self.back)
+                if self.back:
+                    self.back.next_node = chunk
+                else:
+                    self.front = chunk
+                self.back = chunk
+            self.back.values.append(value)
+        else:
+            raise ValueError("Insertion point either not specified or invalid.")
+        self.size += 1
+
+    def pop(self, position):
+        '''
+        Removes the first or last value from an UnrolledLinkedList
+            position:   Determines which value is removed.  Requires "front" or "back"
+        '''
+        if self.empty():
+            raise RuntimeError("Cannot delete from empty list.")
+        if position == "front":
+            chunk = self.front
+            pop_value = chunk.values.pop(0)
+        elif position == "back":
+            chunk = self.back
+            pop_value = chunk.values.pop()
+        else:
+            raise ValueError("Removal point either not specified or invalid.")
+        if not chunk.values:
+            self.__unlink(chunk)
+        self.size -= 1
+        return pop_value
+
+    def __unlink(self, chunk):
+        ''' Detaches an empty chunk from its neighbours. '''
+        if chunk.prev_node:
+            chunk.prev_node.next_node = chunk.next_node
+        else:
+            self.front = chunk.next_node
+        if chunk.next_node:
+            chunk.next_node.prev_node = chunk.prev_node
+        else:
+            self.back = chunk.prev_node
+
+    def remove(self, value):
+        '''
+        Removes all instances of a given value from a list
+        '''
+        target = str(value)
+        chunk = self.front
+        while chunk:
+            kept = [each for each in chunk.values if each != target]
+            self.size -= len(chunk.values) - len(kept)
+            chunk.values = kept
+            if not kept:
+                self.__unlink(chunk)
+            chunk = chunk.next_node
+
+    def find_middle(self):
+        '''
+        Returns the value of the middle element in the list.
+        For lists with an even number of elements, returns both middle values.
+        '''
+        if self.empty():
+            return ()
+        mid = int(self.size/2)
+        first = mid if self.size%2 == 1 else mid-1      #   Index of the (first) middle value
+        chunk = self.front
+        while first >= len(chunk.values):               #   Skip whole chunks
+            first -= len(chunk.values)
+            chunk = chunk.next_node
+        if self.size%2 == 1:
+            return str(chunk.values[first])
+        if first + 1 < len(chunk.values):
+            return (str(chunk.values[first]), str(chunk.values[first+1]))
+        return (str(chunk.values[first]), str(chunk.next_node.values[0]))
+
+class BlockingLinkedList(object):
+    '''
+    Thread-safe LinkedList for producer and consumer threads.  One lock guards the nodes;
+    pop waits while the list is empty and, with a maxsize, push waits while it is full.
+    Push "back" and pop "front" for a queue, push and pop "front" for a stack.
+    '''
+    def __init__(self, initial=None, maxsize=0):
+        '''
+        BlockingLinkedList constructor
+            initial:    Optional parameter.  Same as for LinkedList.
+            maxsize:    Optional parameter.  Most values held at once, or 0 for no limit.
+        '''
+        self.maxsize = maxsize
+        self.items = LinkedList(initial, doubly_linked=True, pool_size=maxsize)
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+
+    def __full(self):
+        return 0 < self.maxsize <= len(self.items)
+
+    def empty(self):
+        with self.lock:
+            return self.items.empty()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.items)
+
+    def __str__(self):
+        with self.lock:
+            return str(self.items)
+
+    def __repr__(self):
+        return "BlockingLinkedList((" + str(self) + "))"
+
+    def push(self, position, value, block=True, timeout=None):
+        '''
+        Inserts a value at the "front" or "back", waiting for room in a full list.
+            block:      Optional parameter.  If False, a full list raises at once.
+            timeout:    Optional parameter.  Seconds to wait before raising RuntimeError.
+        '''
+        if position not in ("front", "back"):
+            raise ValueError("Insertion point either not specified or invalid.")
+        with self.not_full:
+            if self.__full() and not (block and self.not_full.wait_for(
+                    lambda: not self.__full(), timeout)):
+                raise RuntimeError("Cannot insert into full list.")
+            self.items.push(position, value)
+            self.not_empty.notify()
+
+    def pop(self, position, block=True, timeout=None):
+        '''
+        Removes the value at the "front" or "back", waiting for one in an empty list.
+            block:      Optional parameter.  If False, an empty list raises at once.
+            timeout:    Optional parameter.  Seconds to wait before raising RuntimeError.
+        '''
+        if position not in ("front", "back"):
+            raise ValueError("Removal point either not specified or invalid.")
+        with self.not_empty:
+            if self.items.empty() and not (block and self.not_empty.wait_for(
+                    lambda: not self.items.empty(), timeout)):
+                raise RuntimeError("Cannot delete from empty list.")
+            value = self.items.pop(position)
+            self.not_full.notify()
+            return value
+
+class AsyncLinkedList(object):
+    '''
+    LinkedList for asyncio producer and consumer tasks, with awaitable push and pop.
+    Same waiting rules as BlockingLinkedList, for tasks on one event loop.
+    '''
+    def __init__(self, initial=None, maxsize=0):
+        '''
+        AsyncLinkedList constructor
+            initial:    Optional parameter.  Same as for LinkedList.
+            maxsize:    Optional parameter.  Most values held at once, or 0 for no limit.
+        '''
+        self.maxsize = maxsize
+        self.items = LinkedList(initial, doubly_linked=True, pool_size=maxsize)
+        self.changed = None                             #   Created on first wait, inside the running loop
+
+    def __full(self):
+        return 0 < self.maxsize <= len(self.items)
+
+    def empty(self):
+        return self.items.empty()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __str__(self):
+        return str(self.items)
+
+    def __repr__(self):
+        return "AsyncLinkedList((" + str(self) + "))"
+
+    async def __wait(self, predicate, timeout, message):
+        if self.changed is None:
+            self.changed = asyncio.Condition()
+        async with self.changed:
+            try:
+                await asyncio.wait_for(self.changed.wait_for(predicate), timeout)
+            except asyncio.TimeoutError:
+                raise RuntimeError(message)
+
+    async def __notify(self):
+        if self.changed is not None:
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def push(self, position, value, timeout=None):
+        '''
+        Inserts a value at the "front" or "back", waiting for room in a full list.
+            timeout:    Optional parameter.  Seconds to wait before raising RuntimeError.
+        '''
+        if position not in ("front", "back"):
+            raise ValueError("Insertion point either not specified or invalid.")
+        if self.__full():
+            await self.__wait(lambda: not self.__full(), timeout, "Cannot insert into full list.")
+        self.items.push(position, value)
+        await self.__notify()
+
+    async def pop(self, position, timeout=None):
+        '''
+        Removes the value at the "front" or "back", waiting for one in an empty list.
+            timeout:    Optional parameter.  Seconds to wait before raising RuntimeError.
+        '''
+        if position not in ("front", "back"):
+            raise ValueError("Removal point either not specified or invalid.")
+        if self.items.empty():
+            await self.__wait(lambda: not self.items.empty(), timeout, "Cannot delete from empty list.")
+        value = self.items.pop(position)
+        await self.__notify()
+        return value
+
+def benchmark_drain(items=1000000, singly_back_items=20000):
+    '''
+    Times pushing items values to the back, then popping them all from one end, for each end
+    of a doubly-linked and a singly-linked list.  pop("back") on a singly-linked list walks
+    the whole list, so that case drains only singly_back_items values.
+    Returns {(mode, position): (values drained, seconds)}.
+    '''
+    results = {}
+    for doubly_linked in (True, False):
+        mode = "doubly" if doubly_linked else "singly"
+        for position in ("front", "back"):
+            count = singly_back_items if (position, doubly_linked) == ("back", False) else items
+            linked_list = LinkedList(doubly_linked=doubly_linked)
+            for value in range(count):
+                linked_list.push("back", value)
+            start = time.perf_counter()
+            for _ in range(count):
+                linked_list.pop(position)
+            results[(mode, position)] = (count, time.perf_counter() - start)
+    return results
+
+def benchmark_producer_consumer(items=100000, producers=2, consumers=2, maxsize=1024):
+    '''
+    Moves items values from producers to consumers through a BlockingLinkedList (threads)
+    and an AsyncLinkedList (tasks).  Returns values moved per second for each.
+    '''
+    shares = [items // producers + (n < items % producers) for n in range(producers)]
+    done = object()                                     #   One per consumer, after all values
+
+    def produce(channel, share):
+        for value in range(share):
+            channel.push("back", value)
+
+    def consume(channel):
+        while channel.pop("front") is not done:
+            pass
+
+    channel = BlockingLinkedList(maxsize=maxsize)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=consume, args=(channel, )) for _ in range(consumers)]
+    producing = [threading.Thread(target=produce, args=(channel, share)) for share in shares]
+    for thread in threads + producing:
+        thread.start()
+    for thread in producing:
+        thread.join()
+    for _ in range(consumers):
+        channel.push("back", done)
+    for thread in threads:
+        thread.join()
+    threaded = items / (time.perf_counter() - start)
+
+    async def produce_async(channel, share):
+        for value in range(share):
+            await channel.push("back", value)
+
+    async def consume_async(channel):
+        while await channel.pop("front") is not done:
+            pass
+
+    async def run():
+        channel = AsyncLinkedList(maxsize=maxsize)
+        consuming = [asyncio.ensure_future(consume_async(channel)) for _ in range(consumers)]
+        await asyncio.gather(*(produce_async(channel, share) for share in shares))
+        for _ in range(consumers):
+            await channel.push("back", done)
+        await asyncio.gather(*consuming)
+
+    loop = asyncio.new_event_loop()
+    start = time.perf_counter()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    return {"threads": threaded, "asyncio": items / (time.perf_counter() - start)}
 
 ''' C-level work '''
 class TestEmpty(unittest.TestCase):
@@ -260,6 +1590,13 @@ class TestRemove(unittest.TestCase):
         self.assertEqual(linked_list.front.value, 'one')
         self.assertEqual(linked_list.back.value, 'three')
 
+    def test_front_value(self):
+        linked_list = LinkedList((42, 1, 42))
+        linked_list.remove(42)
+        self.assertEqual(repr(linked_list), "LinkedList((1))")
+        self.assertEqual(linked_list.front.value, '1')
+        self.assertEqual(linked_list.back.value, '1')
+
 class TestFindMiddle(unittest.TestCase):
     '''
     Expected behavior:
@@ -283,12 +1620,677 @@ class TestFindMiddle(unittest.TestCase):
         linked_list = LinkedList(("one", "two", "three"))
         self.assertEqual(linked_list.find_middle(),"two")
 
-def fact(number):
-    '''"Pretend" to do recursion via a stack and iteration'''
+''' Doubly-linked mode '''
+class TestDoublyLinked(unittest.TestCase):
+    '''
+    Expected behavior:
+        Same results as the singly-linked list, with prev_node links kept consistent.
+    '''
+    def check_links(self, linked_list):
+        previous, current = None, linked_list.front
+        while current:
+            self.assertIs(current.prev_node, previous)
+            previous, current = current, current.next_node
+        self.assertIs(linked_list.back, previous)
+
+    def test_push_pop(self):
+        linked_list = LinkedList(doubly_linked=True)
+        linked_list.push("front", 1)
+        linked_list.push("back", 2)
+        linked_list.push("front", 0)
+        self.check_links(linked_list)
+        self.assertEqual(linked_list.pop("back"), 2)
+        self.assertEqual(linked_list.pop("front"), 0)
+        self.check_links(linked_list)
+        self.assertEqual(linked_list.pop("back"), 1)
+        self.assertTrue(linked_list.empty())
+        self.assertRaises(RuntimeError, lambda: linked_list.pop("back"))
+
+    def test_initialization(self):
+        linked_list = LinkedList((1, 2, 3), doubly_linked=True)
+        self.check_links(linked_list)
+        self.assertEqual(repr(linked_list), "LinkedList((1, 2, 3))")
+
+    def test_remove(self):
+        linked_list = LinkedList((42, 1, 42, 42, 2, 42), doubly_linked=True)
+        linked_list.remove(42)
+        self.check_links(linked_list)
+        self.assertEqual(repr(linked_list), "LinkedList((1, 2))")
+        self.assertEqual(linked_list.pop("back"), '2')
+
+    def test_benchmark_drain(self):
+        results = benchmark_drain(items=500, singly_back_items=50)
+        self.assertEqual(sorted(results), [("doubly", "back"), ("doubly", "front"),
+                                           ("singly", "back"), ("singly", "front")])
+        self.assertEqual(results[("singly", "back")][0], 50)
+        self.assertEqual(results[("doubly", "back")][0], 500)
+
+''' Value index '''
+class TestValueIndex(unittest.TestCase):
+    '''
+    Expected behavior:
+        Same results as an unindexed list, with the index holding exactly the nodes in the list.
+    '''
+    def check_index(self, linked_list):
+        nodes, current = {}, linked_list.front
+        while current:
+            nodes.setdefault(current.value, set()).add(current)
+            current = current.next_node
+        self.assertEqual({value: set(each) for value, each in linked_list.index.items()}, nodes)
 
+    def test_implies_doubly_linked(self):
+        self.assertTrue(LinkedList(value_index=True).doubly_linked)
+
+    def test_contains(self):
+        for value_index in (False, True):
+            linked_list = LinkedList((1, 2, 3), value_index=value_index)
+            self.assertIn("2", linked_list)
+            self.assertNotIn(2, linked_list)
+            self.assertNotIn([2], linked_list)
+            linked_list.remove(2)
+            self.assertNotIn("2", linked_list)
+
+    def test_push_pop_remove(self):
+        generator = random.Random(2051)
+        indexed, plain = LinkedList(value_index=True), LinkedList()
+        for step in range(2000):
+            choice, value = generator.random(), str(step % 30)
+            if choice < .6:
+                position = generator.choice(("front", "back"))
+                indexed.push(position, value)
+                plain.push(position, value)
+            elif choice < .9 and not plain.empty():
+                position = generator.choice(("front", "back"))
+                self.assertEqual(indexed.pop(position), plain.pop(position))
+            else:
+                indexed.remove(value)
+                plain.remove(value)
+            self.assertEqual(str(indexed), str(plain))
+            self.assertEqual(len(indexed), len(plain))
+        self.check_index(indexed)
+
+    def test_remove_all(self):
+        for value_index in (False, True):
+            linked_list = LinkedList((1, 42, 2, 7, 42, 3, 7), value_index=value_index)
+            linked_list.push("back", [7])
+            linked_list.remove_all((42, 7, 99))
+            self.assertEqual(str(linked_list), "1, 2, 3, [7]")
+            self.assertEqual(len(linked_list), 4)
+            self.assertEqual(linked_list.find_middle(), ("2", "3"))
+            self.assertEqual(linked_list.pop("back"), [7])
+            if value_index:
+                self.check_index(linked_list)
+
+''' Maintained length and middle '''
+class TestLengthAndMiddle(unittest.TestCase):
+    '''
+    Expected behavior:
+        len() and find_middle() agree with a plain Python list after any sequence of changes.
+    '''
+    def expected_middle(self, values):
+        mid = len(values) // 2
+        if not values:
+            return ()
+        return values[mid] if len(values)%2 == 1 else tuple(values[mid-1:mid+1])
+
+    def check(self, doubly_linked):
+        generator = random.Random(2050)
+        linked_list, values = LinkedList(doubly_linked=doubly_linked), []
+        for step in range(2000):
+            choice = generator.random()
+            value = str(step % 50)                      #   Repeats give remove() several matches
+            if choice < .3:
+                linked_list.push("back", value)
+                values.append(value)
+            elif choice < .55:
+                linked_list.push("front", value)
+                values.insert(0, value)
+            elif choice < .95 and values:
+                position = generator.choice(("front", "back"))
+                expected = values.pop(0 if position == "front" else -1)
+                self.assertEqual(linked_list.pop(position), expected)
+            elif values:
+                target = generator.choice(values)
+                linked_list.remove(target)
+                values = [each for each in values if each != target]
+            self.assertEqual(len(linked_list), len(values))
+            self.assertEqual(linked_list.find_middle(), self.expected_middle(values))
+
+    def test_singly(self):
+        self.check(False)
+
+    def test_doubly(self):
+        self.check(True)
+
+    def test_doubly_stays_constant_time(self):
+        linked_list = LinkedList(tuple(range(6)), doubly_linked=True)
+        linked_list.find_middle()
+        linked_list.push("front", -1)
+        linked_list.pop("back")
+        self.assertIsNotNone(linked_list.middle)
+        self.assertEqual(linked_list.find_middle(), ('1', '2'))
+
+    def test_remove_keeps_middle(self):
+        for doubly_linked in (False, True):
+            for values, target in (((7, 1, 7, 2, 3, 7, 4, 7), 7), ((7, 1), 7), ((1, 2, 3), 2), ((7, 7), 7)):
+                linked_list = LinkedList(values, doubly_linked=doubly_linked)
+                linked_list.remove(target)
+                kept = [str(each) for each in values if each != target]
+                if kept:
+                    self.assertEqual(linked_list.middle.value, kept[(len(kept) - 1) // 2])
+                else:
+                    self.assertIsNone(linked_list.middle)
+                self.assertEqual(linked_list.find_middle(), self.expected_middle(kept))
+
+''' Independent iterators and streaming output '''
+class TestIterators(unittest.TestCase):
+    def test_nested(self):
+        linked_list = LinkedList((1, 2, 3))
+        pairs = [(a, b) for a in linked_list for b in linked_list]
+        self.assertEqual(len(pairs), 9)
+        self.assertEqual(pairs[-1], ('3', '3'))
+
+    def test_interleaved(self):
+        linked_list = LinkedList((1, 2, 3))
+        first, second = iter(linked_list), iter(linked_list)
+        self.assertEqual(next(first), '1')
+        self.assertEqual(next(second), '1')
+        self.assertEqual(next(first), '2')
+        self.assertEqual(list(second), ['2', '3'])
+
+    def test_remove_while_iterating(self):
+        linked_list = LinkedList((1, 2, 1, 3))
+        seen = []
+        for each in linked_list:
+            seen.append(each)
+            if each == '2':
+                linked_list.remove(1)
+        self.assertEqual(seen, ['1', '2', '1', '3'])
+        self.assertEqual(str(linked_list), '2, 3')
+
+    def test_write(self):
+        linked_list = LinkedList(tuple(range(10)))
+        for representation, expected in ((False, str(linked_list)), (True, repr(linked_list))):
+            stream = io.StringIO()
+            linked_list.write(stream, representation, batch=3)
+            self.assertEqual(stream.getvalue(), expected)
+        stream = io.StringIO()
+        LinkedList().write(stream, True)
+        self.assertEqual(stream.getvalue(), "LinkedList(())")
+        stream = io.StringIO()
+        UnrolledLinkedList((1, 2)).write(stream, True, batch=1)
+        self.assertEqual(stream.getvalue(), "UnrolledLinkedList((1, 2))")
+
+''' Positional index '''
+class TestPositionalIndex(unittest.TestCase):
+    '''
+    Expected behavior:
+        Indexing, slicing, insert() and del agree with a plain Python list, with every express
+        level linking the right nodes at the right widths.
+    '''
+    def check_lanes(self, linked_list):
+        positions = linked_list.positions
+        nodes, current = [], linked_list.front
+        while current:
+            nodes.append(current)
+            current = current.next_node
+        for level in range(len(positions.first)):
+            on_level = [i for i, node in enumerate(nodes) if node.lanes and len(node.lanes) > level]
+            self.assertTrue(on_level)
+            self.assertIs(positions.first[level], nodes[on_level[0]])
+            self.assertIs(positions.last[level], nodes[on_level[-1]])
+            self.assertEqual(positions.first_at[level] + positions.shift, on_level[0])
+            self.assertEqual(positions.last_at[level] + positions.shift, on_level[-1])
+            for before, after in zip([None] + on_level, on_level + [None]):
+                if before is not None:
+                    lane = nodes[before].lanes[level]
+                    self.assertIs(lane.next_node, None if after is None else nodes[after])
+                    self.assertEqual(lane.width, 0 if after is None else after - before)
+                if after is not None:
+                    expected = None if before is None else nodes[before]
+                    self.assertIs(nodes[after].lanes[level].prev_node, expected)
+        self.assertFalse(any(node.lanes and len(node.lanes) > len(positions.first) for node in nodes))
+
+    def test_against_list(self):
+        generator = random.Random(2016)
+        for value_index in (False, True):
+            linked_list = LinkedList(positional_index=True, value_index=value_index)
+            values = []
+            for step in range(3000):
+                choice, value = generator.random(), str(step % 40)
+                if choice < .2:
+                    position = generator.choice(("front", "back"))
+                    linked_list.push(position, value)
+                    values.insert(0 if position == "front" else len(values), value)
+                elif choice < .45:
+                    index = generator.randint(-len(values) - 2, len(values) + 2)
+                    linked_list.insert(index, value)
+                    values.insert(index, value)
+                elif choice < .6 and values:
+                    position = generator.choice(("front", "back"))
+                    expected = values.pop(0 if position == "front" else -1)
+                    self.assertEqual(linked_list.pop(position), expected)
+                elif choice < .8 and values:
+                    index = generator.randrange(-len(values), len(values))
+                    del linked_list[index]
+                    del values[index]
+                elif choice < .83:
+                    linked_list.remove(value)
+                    values = [each for each in values if each != value]
+                elif values:
+                    index = generator.randrange(-len(values), len(values))
+                    self.assertEqual(linked_list[index], values[index])
+                self.assertEqual(len(linked_list), len(values))
+                if step % 100 == 0:
+                    self.assertEqual(list(linked_list), values)
+                    self.check_lanes(linked_list)
+            self.assertEqual(list(linked_list), values)
+            self.check_lanes(linked_list)
+
+    def test_slices(self):
+        for positional_index in (False, True):
+            linked_list = LinkedList(tuple(range(20)), positional_index=positional_index)
+            values = [str(each) for each in range(20)]
+            for piece in (slice(None), slice(3, 15), slice(None, None, 3), slice(18, 2, -4),
+                          slice(-5, None), slice(5, 5), slice(None, None, -1)):
+                self.assertEqual(list(linked_list[piece]), values[piece])
+            del linked_list[2:17:5]
+            del values[2:17:5]
+            self.assertEqual(list(linked_list), values)
+            if positional_index:
+                self.check_lanes(linked_list)
+
+    def test_errors(self):
+        for positional_index in (False, True):
+            linked_list = LinkedList((1, 2), positional_index=positional_index)
+            self.assertRaises(IndexError, lambda: linked_list[2])
+            self.assertRaises(IndexError, lambda: linked_list[-3])
+            self.assertRaises(TypeError, lambda: linked_list["0"])
+            self.assertRaises(IndexError, lambda: LinkedList().__delitem__(0))
+
+    def test_singly_linked(self):
+        linked_list = LinkedList((1, 2, 3))
+        linked_list.insert(1, 'a')
+        linked_list.insert(-1, 'b')
+        del linked_list[2]
+        self.assertEqual(str(linked_list), '1, a, b, 3')
+        self.assertEqual(linked_list[-2], 'b')
+        self.assertEqual(linked_list.find_middle(), ('a', 'b'))
+        self.assertEqual(linked_list.pop("back"), '3')
+
+''' Node pool and batch operations '''
+class TestBatches(unittest.TestCase):
+    MODES = ({}, {"doubly_linked": True}, {"value_index": True}, {"positional_index": True})
+
+    def test_extend(self):
+        for mode in self.MODES:
+            linked_list = LinkedList((1, 2), **mode)
+            linked_list.extend([3, 4])
+            linked_list.extend(iter([-1, 0]), "front")
+            linked_list.extend([])
+            self.assertEqual(list(linked_list), [-1, 0, '1', '2', 3, 4])
+            self.assertEqual(len(linked_list), 6)
+            self.assertEqual(linked_list.find_middle(), ('1', '2'))
+            self.assertEqual(linked_list.pop("back"), 4)
+            self.assertEqual(linked_list.pop("front"), -1)
+            self.assertRaises(ValueError, lambda: linked_list.extend([1], "middle"))
+            if mode.get("value_index"):
+                self.assertIn(3, linked_list)
+            if mode.get("positional_index"):
+                self.assertEqual(linked_list[2], '2')
+                TestPositionalIndex.check_lanes(self, linked_list)
+
+    def test_drain(self):
+        for mode in self.MODES:
+            linked_list = LinkedList(tuple(range(10)), **mode)
+            self.assertEqual(linked_list.drain(3), ['0', '1', '2'])
+            self.assertEqual(linked_list.drain(2, "back"), ['9', '8'])
+            self.assertEqual(linked_list.drain(0), [])
+            self.assertEqual(str(linked_list), '3, 4, 5, 6, 7')
+            self.assertEqual(linked_list.find_middle(), '5')
+            if mode.get("positional_index"):
+                self.assertEqual(linked_list[-1], '7')
+                TestPositionalIndex.check_lanes(self, linked_list)
+            self.assertEqual(linked_list.drain(position="back"), ['7', '6', '5', '4', '3'])
+            self.assertTrue(linked_list.empty())
+            self.assertEqual(len(linked_list), 0)
+            linked_list.push("back", 1)
+            self.assertEqual(linked_list.drain(5), [1])
+
+    def test_stringify(self):
+        linked_list = LinkedList((1, 2.5, None, 1), stringify=False)
+        self.assertEqual(list(linked_list), [1, 2.5, None, 1])
+        linked_list.remove(1)
+        self.assertEqual(list(linked_list), [2.5, None])
+        self.assertEqual(list(linked_list[::-1]), [None, 2.5])
+        for value_index in (False, True):
+            linked_list = LinkedList(stringify=False, value_index=value_index)
+            linked_list.extend([[1], 2, [1], {3: 4}, 2])
+            linked_list.remove([1])
+            self.assertEqual(list(linked_list), [2, {3: 4}, 2])
+            linked_list.remove_all(({3: 4}, 2, 5))
+            self.assertTrue(linked_list.empty())
+
+    def test_pool(self):
+        for mode in self.MODES:
+            linked_list = LinkedList(pool_size=2, **mode)
+            linked_list.extend(range(5))
+            nodes = [linked_list.front, linked_list.front.next_node]
+            self.assertEqual(linked_list.drain(4), [0, 1, 2, 3])
+            self.assertEqual(len(linked_list.spare), 2)
+            self.assertTrue(all(node.value is None for node in linked_list.spare))
+            linked_list.push("front", 'a')
+            linked_list.push("back", 'b')
+            self.assertEqual(linked_list.spare, [])
+            self.assertTrue(linked_list.front in nodes)
+            self.assertEqual(list(linked_list), ['a', 4, 'b'])
+            if mode.get("positional_index"):
+                self.assertEqual(linked_list[1], 4)
+                TestPositionalIndex.check_lanes(self, linked_list)
+            self.assertEqual(linked_list.pop("front"), 'a')
+            self.assertEqual(len(linked_list.spare), 1)
+
+    def test_pool_spares_iterators(self):
+        for mode in self.MODES:
+            seen = []
+            for pool_size in (0, 4):                    #   A pool must not change what an iterator sees
+                linked_list = LinkedList((1, 2, 3), pool_size=pool_size, **mode)
+                iterator = iter(linked_list)
+                self.assertEqual(next(iterator), '1')
+                linked_list.pop("front")
+                linked_list.pop("front")
+                linked_list.push("back", 'x')
+                seen.append(list(iterator))
+                self.assertEqual(linked_list.spare, [])
+            self.assertEqual(seen[1], seen[0])
+            self.assertIn('3', seen[1])
+            iterator = iter(linked_list)                #   Abandoned iterators stop holding the pool back
+            next(iterator)
+            del iterator
+            linked_list.pop("front")
+            self.assertEqual(len(linked_list.spare), 1)
+            for _ in linked_list:
+                pass
+            linked_list.pop("front")
+            self.assertEqual(len(linked_list.spare), 2)
+
+''' Checkpoints '''
+class TestCheckpoint(unittest.TestCase):
+    VALUES = ["one", "", 2, -2 ** 70, 3.5, b"\x00\xff", "été"]
+
+    def round_trip(self, linked_list, **options):
+        stream = io.BytesIO()
+        linked_list.save(stream)
+        stream.seek(0)
+        return LinkedList.load(stream, **options)
+
+    def test_round_trip(self):
+        linked_list = LinkedList(stringify=False)
+        linked_list.extend(self.VALUES)
+        for mode in TestBatches.MODES:
+            loaded = self.round_trip(linked_list, **mode)
+            self.assertEqual(list(loaded), self.VALUES)
+            self.assertEqual(len(loaded), len(self.VALUES))
+            self.assertEqual(loaded.pop("back"), self.VALUES[-1])
+            if mode.get("positional_index"):
+                self.assertEqual(loaded[2], 2)
+        self.assertTrue(self.round_trip(LinkedList()).empty())
+        self.assertEqual(str(self.round_trip(LinkedList((1, 2)))), '1, 2')
+
+    def test_streams_in_blocks(self):
+        linked_list = LinkedList(stringify=False)
+        linked_list.extend("x" * 100 for _ in range(25000))
+        stream = io.BytesIO()
+        linked_list.save(stream)
+        self.assertGreater(len(stream.getvalue()), 2 * _CHECKPOINT_BLOCK)
+        stream.seek(0)
+        loaded = LinkedList.load(stream)
+        self.assertEqual(len(loaded), 25000)
+        self.assertEqual(loaded.back.value, "x" * 100)
+
+    def test_errors(self):
+        linked_list = LinkedList()
+        linked_list.push("back", [1])
+        self.assertRaises(TypeError, lambda: linked_list.save(io.BytesIO()))
+        self.assertRaises(ValueError, lambda: LinkedList.load(io.BytesIO(b"not a checkpoint at all")))
+        stream = io.BytesIO()
+        LinkedList((1, 2, 3)).save(stream)
+        for end in (-1, 10):
+            self.assertRaises(ValueError, lambda: LinkedList.load(io.BytesIO(stream.getvalue()[:end])))
+
+''' Sorting, merging and splicing '''
+class TestSortMergeSplice(unittest.TestCase):
+    MODES = TestBatches.MODES
+
+    def check(self, linked_list, expected, mode):
+        self.assertEqual(list(linked_list), expected)
+        self.assertEqual(len(linked_list), len(expected))
+        if expected:
+            self.assertEqual(linked_list.pop("back"), expected[-1])
+            linked_list.push("back", expected[-1])
+        if mode.get("doubly_linked") or mode.get("value_index"):
+            TestDoublyLinked.check_links(self, linked_list)
+        if mode.get("value_index"):
+            TestValueIndex.check_index(self, linked_list)
+        if mode.get("positional_index"):
+            TestPositionalIndex.check_lanes(self, linked_list)
+            if expected:
+                self.assertEqual(linked_list[len(expected) // 2], expected[len(expected) // 2])
+
+    def test_sort(self):
+        generator = random.Random(2019)
+        for mode in self.MODES:
+            for size in (0, 1, 2, 7, 64, 301):
+                values = [generator.randrange(50) for _ in range(size)]
+                linked_list = LinkedList(stringify=False, **mode)
+                linked_list.extend(values)
+                nodes = set()
+                node = linked_list.front
+                while node:
+                    nodes.add(node)
+                    node = node.next_node
+                linked_list.sort()
+                node = linked_list.front
+                while node:                             #   Same nodes, only relinked
+                    self.assertIn(node, nodes)
+                    node = node.next_node
+                self.check(linked_list, sorted(values), mode)
+                self.assertEqual(linked_list.find_middle(), LinkedList(tuple(sorted(values))).find_middle())
+
+    def test_sort_key_reverse_stable(self):
+        pairs = [(3, 'a'), (1, 'b'), (3, 'c'), (2, 'd'), (1, 'e')]
+        for reverse in (False, True):
+            linked_list = LinkedList(stringify=False)
+            linked_list.extend(pairs)
+            linked_list.sort(key=lambda pair: pair[0], reverse=reverse)
+            self.assertEqual(list(linked_list), sorted(pairs, key=lambda pair: pair[0], reverse=reverse))
+
+    def test_merge(self):
+        for mode in self.MODES:
+            first, second = LinkedList(stringify=False, **mode), LinkedList(stringify=False, **mode)
+            first.extend([1, 4, 4, 9])
+            second.extend([0, 4, 5, 10, 11])
+            first.merge(second)
+            self.check(first, [0, 1, 4, 4, 4, 5, 9, 10, 11], mode)
+            self.assertTrue(second.empty())
+            self.assertEqual(len(second), 0)
+            second.push("back", 3)
+            self.assertEqual(list(second), [3])
+            first.merge(LinkedList(**mode))
+            self.assertEqual(len(first), 9)
+        first, second = LinkedList(stringify=False), LinkedList(stringify=False)
+        first.extend(['b', 'D'])
+        second.extend(['A', 'c'])
+        first.merge(second, key=str.lower, reverse=False)
+        self.assertEqual(list(first), ['A', 'b', 'c', 'D'])
+
+    def test_splice(self):
+        for mode in self.MODES:
+            first, second = LinkedList((1, 2, 3), **mode), LinkedList((4, 5), **mode)
+            first.find_middle()
+            first.splice(second)
+            self.check(first, ['1', '2', '3', '4', '5'], mode)
+            self.assertEqual(first.find_middle(), '3')
+            self.assertTrue(second.empty())
+            empty = LinkedList(**mode)
+            empty.splice(first)
+            self.check(empty, ['1', '2', '3', '4', '5'], mode)
+            empty.splice(LinkedList(**mode))
+            self.assertEqual(len(empty), 5)
+
+    def test_incompatible(self):
+        self.assertRaises(ValueError, lambda: LinkedList().splice(LinkedList(doubly_linked=True)))
+        self.assertRaises(ValueError, lambda: LinkedList(value_index=True).merge(
+            LinkedList(positional_index=True)))
+
+''' Blocking and asyncio lists '''
+class TestBlocking(unittest.TestCase):
+    def test_queue_and_stack(self):
+        channel = BlockingLinkedList((1, 2))
+        channel.push("back", 3)
+        channel.push("front", 0)
+        self.assertEqual(repr(channel), "BlockingLinkedList((0, 1, 2, 3))")
+        self.assertEqual(channel.pop("front"), 0)
+        self.assertEqual(channel.pop("back"), 3)
+        self.assertEqual(len(channel), 2)
+        self.assertRaises(ValueError, lambda: channel.push("middle", 4))
+
+    def test_timeouts(self):
+        channel = BlockingLinkedList(maxsize=1)
+        self.assertRaises(RuntimeError, lambda: channel.pop("front", block=False))
+        self.assertRaises(RuntimeError, lambda: channel.pop("front", timeout=.01))
+        channel.push("back", 1)
+        self.assertRaises(RuntimeError, lambda: channel.push("back", 2, block=False))
+        self.assertRaises(RuntimeError, lambda: channel.push("back", 2, timeout=.01))
+        self.assertEqual(channel.pop("back"), 1)
+        self.assertTrue(channel.empty())
+
+    def test_producers_consumers(self):
+        channel, received = BlockingLinkedList(maxsize=8), []
+
+        def produce(start):
+            for value in range(start, start + 500):
+                channel.push("back", value)
+
+        def consume():
+            for _ in range(1000):
+                received.append(channel.pop("front"))
+
+        threads = [threading.Thread(target=consume) for _ in range(2)]
+        threads += [threading.Thread(target=produce, args=(n * 500, )) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(received), list(range(2000)))
+        self.assertTrue(channel.empty())
+
+class TestAsync(unittest.TestCase):
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_timeouts(self):
+        async def check():
+            channel = AsyncLinkedList(maxsize=1)
+            with self.assertRaises(RuntimeError):
+                await channel.pop("front", timeout=.01)
+            await channel.push("front", 1)
+            with self.assertRaises(RuntimeError):
+                await channel.push("back", 2, timeout=.01)
+            self.assertEqual(repr(channel), "AsyncLinkedList((1))")
+            self.assertEqual(await channel.pop("back"), 1)
+        self.run_async(check())
+
+    def test_producers_consumers(self):
+        async def check():
+            channel, received = AsyncLinkedList(maxsize=4), []
+
+            async def produce(start):
+                for value in range(start, start + 250):
+                    await channel.push("back", value)
+
+            async def consume():
+                for _ in range(500):
+                    received.append(await channel.pop("front"))
+
+            await asyncio.gather(*([consume() for _ in range(2)] + [produce(n * 250) for n in range(4)]))
+            return received
+        self.assertEqual(sorted(self.run_async(check())), list(range(1000)))
+
+    def test_benchmark(self):
+        rates = benchmark_producer_consumer(items=2000, producers=2, consumers=3, maxsize=16)
+        self.assertEqual(sorted(rates), ["asyncio", "threads"])
+        self.assertTrue(all(rate > 0 for rate in rates.values()))
+
+''' Compact storage '''
+class TestSlots(unittest.TestCase):
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(LinkedList.Node(1, None), '__dict__'))
+        self.assertFalse(hasattr(LinkedList.DoubleNode(1, None), '__dict__'))
+
+class TestUnrolled(unittest.TestCase):
+    '''
+    Expected behavior:
+        Same results as LinkedList, across chunk boundaries.
+    '''
+    def test_push_pop(self):
+        linked_list = UnrolledLinkedList(chunk_size=2)
+        for i in range(5):
+            linked_list.push("back", i)
+            linked_list.push("front", -i)
+        self.assertEqual(list(linked_list), [-4, -3, -2, -1, 0, 0, 1, 2, 3, 4])
+        self.assertEqual([linked_list.pop("back") for _ in range(6)], [4, 3, 2, 1, 0, 0])
+        self.assertEqual([linked_list.pop("front") for _ in range(4)], [-4, -3, -2, -1])
+        self.assertTrue(linked_list.empty())
+        self.assertRaises(RuntimeError, lambda: linked_list.pop("front"))
+        self.assertRaises(ValueError, lambda: linked_list.push("middle", 1))
+
+    def test_str_repr(self):
+        linked_list = UnrolledLinkedList((1, 2, 3))
+        self.assertEqual(str(linked_list), '1, 2, 3')
+        self.assertEqual(repr(linked_list), 'UnrolledLinkedList((1, 2, 3))')
+
+    def test_remove(self):
+        linked_list = UnrolledLinkedList((42, 1, 42, 42, 2, 42, 142), chunk_size=2)
+        linked_list.remove(42)
+        self.assertEqual(str(linked_list), '1, 2, 142')
+        self.assertEqual(linked_list.size, 3)
+        self.assertEqual(linked_list.pop("back"), '142')
+        self.assertEqual(linked_list.pop("front"), '1')
+
+    def test_find_middle(self):
+        for size in range(8):
+            expected = LinkedList(tuple(range(size))).find_middle()
+            linked_list = UnrolledLinkedList(tuple(range(size)), chunk_size=3)
+            self.assertEqual(linked_list.find_middle(), expected)
+
+_FACT_CACHE = OrderedDict()                             #   n -> n!, most recently used last
+_FACT_CACHE_SIZE = 16
+
+def fact(number, method="stack"):
+    '''
+    Returns number!
+        method:     Optional parameter.
+                    "stack":    "Pretend" to do recursion via a stack and iteration.
+                    "tree":     Multiply the factors pairwise up a product tree, so the big
+                                multiplications are between numbers of similar size.
+                    "swing":    Luschny's prime swing: n! = (n//2)!**2 * swing(n), where swing(n)
+                                is a product of prime powers found with a sieve.
+                    Both fast methods share a small cache of recent results, and start
+                    from the nearest cached smaller n when there is one.
+    '''
+    if method not in ("stack", "tree", "swing"):
+        raise ValueError("Method must be 'stack', 'tree' or 'swing'.")
     if number < 0: raise ValueError("Less than zero")
     if number == 0 or number == 1: return 1
 
+    if method != "stack":
+        return _cached_fact(number, method)
+
     stack = LinkedList()
     while number > 1:
         stack.push("front", number)
@@ -300,6 +2302,74 @@ def fact(number):
 
     return result
 
+def _cached_fact(number, method):
+    if number in _FACT_CACHE:
+        _FACT_CACHE.move_to_end(number)
+        return _FACT_CACHE[number]
+    start = max((each for each in _FACT_CACHE if each < number), default=None)
+    if start is not None and number - start < number // 2:
+        result = _FACT_CACHE[start] * _product(start + 1, number + 1)
+    elif method == "tree":
+        result = _product(2, number + 1)
+    else:
+        result = _swing_fact(number, _primes(number))
+    _FACT_CACHE[number] = result
+    if len(_FACT_CACHE) > _FACT_CACHE_SIZE:
+        _FACT_CACHE.popitem(last=False)
+    return result
+
+def _product(low, high):
+    '''
+    Returns the product of the integers in [low, high) by binary splitting
+    '''
+    if high - low <= 16:
+        result = 1
+        for each in range(low, high):
+            result *= each
+        return result
+    middle = (low + high) // 2
+    return _product(low, middle) * _product(middle, high)
+
+def _product_of(values, low=0, high=None):
+    '''
+    Returns the product of values[low:high] by binary splitting
+    '''
+    if high is None:
+        high = len(values)
+    if high - low <= 16:
+        result = 1
+        for each in values[low:high]:
+            result *= each
+        return result
+    middle = (low + high) // 2
+    return _product_of(values, low, middle) * _product_of(values, middle, high)
+
+def _primes(limit):
+    '''
+    Returns the primes up to limit from a sieve of Eratosthenes
+    '''
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0:2] = b"\x00\x00"
+    for each in range(2, int(limit ** .5) + 1):
+        if sieve[each]:
+            sieve[each * each::each] = bytes(len(range(each * each, limit + 1, each)))
+    return [each for each in range(2, limit + 1) if sieve[each]]
+
+def _swing_fact(number, primes):
+    if number < 2:
+        return 1
+    factors = []                                        #   Prime powers of swing(number)
+    for prime in primes:
+        if prime > number:
+            break
+        quotient, exponent = number, 0
+        while quotient:
+            quotient //= prime
+            exponent += quotient & 1
+        if exponent:
+            factors.append(prime ** exponent if exponent > 1 else prime)
+    return _swing_fact(number // 2, primes) ** 2 * _product_of(factors)
+
 class TestFactorial(unittest.TestCase):
     def test_less_than_zero(self):
         self.assertRaises(ValueError, lambda: fact(-1))
@@ -312,5 +2382,30 @@ class TestFactorial(unittest.TestCase):
     def test_10(self):
         self.assertEqual(fact(10), 10*9*8*7*6*5*4*3*2*1)
 
+class TestFastFactorial(unittest.TestCase):
+    def setUp(self):
+        _FACT_CACHE.clear()
+
+    def test_methods_agree(self):
+        for method in ("tree", "swing"):
+            _FACT_CACHE.clear()
+            for number in list(range(60)) + [1000, 2047, 2048, 4099]:
+                self.assertEqual(fact(number, method), fact(number))
+
+    def test_errors(self):
+        for method in ("stack", "tree", "swing"):
+            self.assertRaises(ValueError, lambda: fact(-1, method))
+        self.assertRaises(ValueError, lambda: fact(5, "loop"))
+
+    def test_cache(self):
+        expected = fact(3000)
+        self.assertEqual(fact(2990, "swing"), fact(2990))
+        self.assertEqual(fact(3000, "tree"), expected)  #   Extends the cached 2990!
+        self.assertIs(fact(3000, "swing"), _FACT_CACHE[3000])
+        for number in range(100, 100 + 2 * _FACT_CACHE_SIZE):
+            fact(number, "tree")
+        self.assertEqual(len(_FACT_CACHE), _FACT_CACHE_SIZE)
+        self.assertNotIn(3000, _FACT_CACHE)
+
 if '__main__' == __name__:
     unittest.main()
\ No newline at end of file